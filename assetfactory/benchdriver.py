@@ -0,0 +1,233 @@
+"""
+Runs an fzf implementation over haystacks of several sizes and writes a
+results log in the layout that base.ParsedRun reads (like the
+images/2021/08/30/results-*.txt logs):
+
+    python benchdriver.py --fzf-type go-native --sizes 10 11 12 --repeat 3 \
+        --haystack-dir ../haystacks --output results-mine.txt -- ./main {haystack}
+
+For every run the header and `fzf-type:` lines are written, followed by
+everything the command prints, followed by a `/usr/bin/time -v` style block
+with the wall clock time and CPU times that os.wait4 reported, and the peak
+RSS of the command.
+The command itself has to print the timestamped events (`start`,
+`lines.txt loaded: <n> lines`, `Fzf initialized`, ...) and search results
+(`Searching for '...' resulted in <n> results.`, `---`, `hash:`, `+++`) in
+the format that base.ParsedRun expects (reference.py defines the hash).
+`{haystack}` and `{nrlines}` in the command are replaced by the haystack
+file and its number of lines; without `{haystack}` the haystack file is
+appended as last argument.
+"""
+from __future__ import annotations
+import argparse
+import io
+import logging
+import os
+import pathlib
+import resource
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import typing as t
+
+logger = logging.getLogger()
+
+# how often the peak RSS of the command is read from /proc
+POLL_SECONDS = 0.01
+
+
+class Measurement(t.NamedTuple):
+    output: str
+    elapsed_seconds: float
+    exit_status: int
+    rusage: resource.struct_rusage
+    # kilobytes
+    peak_rss: int
+    # "VmHWM" if sampled from /proc, "ru_maxrss" if not (see measure)
+    peak_rss_source: str
+
+
+def _peak_rss(pid: int) -> t.Optional[int]:
+    """VmHWM of a running process in kilobytes, None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def measure(command: t.Sequence[str]) -> Measurement:
+    """
+    Runs `command`, with the rusage of just that process (os.wait4).
+
+    The ru_maxrss that Linux reports is at least the RSS of this (python,
+    numpy) process when it forked the command, so the peak RSS is instead
+    sampled from /proc while the command runs, starting right after the
+    exec. ru_maxrss is only used where that is not available, or for commands
+    that exit before the first sample; since it is not comparable to the
+    sampled peak, that is logged as a warning.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                               stdin=subprocess.DEVNULL, text=True)
+    output: t.List[str] = []
+    reader = threading.Thread(target=lambda: output.append(process.stdout.read()))
+    reader.start()
+    peak_rss = None
+    while True:
+        # VmHWM only grows while the command runs; Popen returns after the
+        # exec, so this never sees the memory of the forked python process.
+        # It is sampled before every wait4, so a command that exits soon still
+        # gets its first sample
+        peak_rss = _peak_rss(process.pid) or peak_rss
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        time.sleep(POLL_SECONDS)
+    elapsed = time.perf_counter() - start
+    reader.join()
+    process.stdout.close()
+    # already reaped; tell Popen so it does not wait for it again
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if peak_rss is None:
+        logger.warning("No VmHWM sample of %s, its peak RSS is ru_maxrss, "
+                       "which includes the RSS of this process",
+                       shlex.join(command))
+        return Measurement("".join(output), elapsed, process.returncode,
+                           rusage, rusage.ru_maxrss, "ru_maxrss")
+    return Measurement("".join(output), elapsed, process.returncode, rusage,
+                       peak_rss, "VmHWM")
+
+
+def format_elapsed(seconds: float) -> str:
+    """Like GNU time: h:mm:ss, or m:ss.cc below an hour"""
+    if seconds >= 3600:
+        hours, rest = divmod(int(seconds), 3600)
+        return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes)}:{rest:05.2f}"
+
+
+def time_report(command: t.Sequence[str], measurement: Measurement) -> str:
+    """The lines that `/usr/bin/time -v` writes for the measurement"""
+    usage = measurement.rusage
+    cpu = usage.ru_utime + usage.ru_stime
+    percent = cpu / measurement.elapsed_seconds * 100 if measurement.elapsed_seconds else 0
+    fields = [
+        ("Command being timed", f'"{shlex.join(command)}"'),
+        ("User time (seconds)", f"{usage.ru_utime:.2f}"),
+        ("System time (seconds)", f"{usage.ru_stime:.2f}"),
+        ("Percent of CPU this job got", f"{percent:.0f}%"),
+        ("Elapsed (wall clock) time (h:mm:ss or m:ss)",
+         format_elapsed(measurement.elapsed_seconds)),
+        ("Average shared text size (kbytes)", 0),
+        ("Average unshared data size (kbytes)", 0),
+        ("Average stack size (kbytes)", 0),
+        ("Average total size (kbytes)", 0),
+        ("Maximum resident set size (kbytes)", measurement.peak_rss),
+        ("Average resident set size (kbytes)", 0),
+        ("Major (requiring I/O) page faults", usage.ru_majflt),
+        ("Minor (reclaiming a frame) page faults", usage.ru_minflt),
+        ("Voluntary context switches", usage.ru_nvcsw),
+        ("Involuntary context switches", usage.ru_nivcsw),
+        ("Swaps", usage.ru_nswap),
+        ("File system inputs", usage.ru_inblock),
+        ("File system outputs", usage.ru_oublock),
+        ("Socket messages sent", usage.ru_msgsnd),
+        ("Socket messages received", usage.ru_msgrcv),
+        ("Signals delivered", usage.ru_nsignals),
+        ("Page size (bytes)", resource.getpagesize()),
+        ("Exit status", measurement.exit_status),
+    ]
+    return "".join(f"\t{name}: {value}\n" for name, value in fields)
+
+
+def expand_command(command: t.Sequence[str], haystack: pathlib.Path,
+                   nrlines: int) -> t.Sequence[str]:
+    expanded = [part.format(haystack=haystack, nrlines=nrlines)
+                for part in command]
+    if not any("{haystack}" in part for part in command):
+        expanded.append(str(haystack))
+    return expanded
+
+
+def run_log(fzf_type: str, nrlines: int, command: t.Sequence[str]) -> str:
+    """The complete log of one run"""
+    measurement = measure(command)
+    if measurement.exit_status:
+        logger.warning("%s exited with status %d", shlex.join(command),
+                       measurement.exit_status)
+    output = measurement.output
+    if output and not output.endswith("\n"):
+        output += "\n"
+    return (f"********************** {nrlines}.txt {fzf_type}\n"
+            f"fzf-type: {fzf_type}\n"
+            + output
+            + time_report(command, measurement))
+
+
+def check_run(base, log: str) -> bool:
+    """Whether base.py parses the run completely (so it is not aborted)"""
+    try:
+        runs = list(base._iterParsedRuns(io.StringIO(log)))
+    except (KeyError, AssertionError, ValueError, IndexError) as e:
+        logger.warning("Cannot parse run: %r", e)
+        return False
+    return len(runs) == 1 and not runs[0].aborted
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fzf-type", required=True,
+                        help="As logged in the fzf-type: line (see "
+                        "base.TYPE_MAP)")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(range(10, 25)),
+                        help="Haystack sizes, as powers of 2")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--haystack-dir", type=pathlib.Path,
+                        default=pathlib.Path(".."),
+                        help="Directory with the <nrlines>.txt haystacks "
+                        "(see haystack.py)")
+    parser.add_argument("--output", type=pathlib.Path, required=True)
+    parser.add_argument("--append", action="store_true",
+                        help="Append to the output instead of replacing it")
+    parser.add_argument("--no-check", dest="check", action="store_false",
+                        help="Do not check that base.py can parse every run")
+    parser.add_argument("command", nargs="+")
+    args = parser.parse_args()
+
+    base = None
+    if args.check:
+        from benchmark import load_base
+        base = load_base()
+    incomplete = 0
+    with open(args.output, "a" if args.append else "w") as f:
+        for repetition in range(args.repeat):
+            for exp in args.sizes:
+                nrlines = 2 ** exp
+                haystack = args.haystack_dir / f"{nrlines}.txt"
+                command = expand_command(args.command, haystack, nrlines)
+                log = run_log(args.fzf_type, nrlines, command)
+                f.write(log)
+                f.flush()
+                if base is not None and not check_run(base, log):
+                    incomplete += 1
+                    logger.warning("Run %d of %d lines is incomplete",
+                                   repetition + 1, nrlines)
+                else:
+                    logger.info("Run %d of %d lines done", repetition + 1,
+                                nrlines)
+    logger.info("Wrote %s", args.output)
+    if incomplete:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
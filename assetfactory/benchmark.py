@@ -0,0 +1,236 @@
+"""
+Benchmarks the stages of the assetfactory pipeline itself on synthetic
+results logs, so that changes to (for instance) base.py that make the
+pipeline slower are noticed.
+
+    python benchmark.py --lines 10000 1000000 --output bench.json
+    python benchmark.py --lines 10000 1000000 --baseline bench.json
+
+Every stage is timed separately (best of --repeat); with --baseline the
+results are compared to an earlier --output file, and the exit status is 1
+when a stage got slower than the tolerance allows.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import importlib
+import io
+import json
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+import typing as t
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+import dataset
+
+logger = logging.getLogger()
+
+HERE = pathlib.Path(__file__).resolve().parent
+BASE_FILENAME = HERE / "images" / "2021" / "08" / "30" / "base.py"
+
+SYNTHETIC_TYPES = ("go", "tinygo", "go-native")
+SYNTHETIC_NRLINES_EXP = range(10, 18)
+
+
+def load_base():
+    spec = importlib.util.spec_from_file_location("base", BASE_FILENAME)
+    base = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(base)
+    return base
+
+
+def synthetic_run(rng: np.random.Generator, fzf_type: str, nrlines: int,
+                  start_ms: int) -> t.Sequence[str]:
+    """The log lines of one run, in the layout that base.ParsedRun reads"""
+    native = fzf_type.endswith("native")
+    now = start_ms
+    lines = [f"********************** {nrlines}.txt {fzf_type}",
+             f"fzf-type: {fzf_type}",
+             f"start {now} 0"]
+
+    def event(name: str, duration_ms: int) -> str:
+        nonlocal now
+        now += duration_ms
+        return f"{name} {now} {now - start_ms}"
+
+    load_ms = int(rng.integers(1, 5)) + nrlines // 4000
+    if not native:
+        lines.append(event("js/wasm loaded", 0))
+    lines.append(event(f"lines.txt loaded: {nrlines} lines", load_ms))
+    if not native:
+        lines.extend([
+            event("startTimeSet", 0),
+            event("newStart", 0),
+            event("newFinishedParse", nrlines // 800 + 1),
+            event("newDone", 0),
+        ])
+    lines.append(event("Fzf initialized", nrlines // 5000 + 1))
+    nrresults = nrlines // 4
+    for i in range(1, len("hello world") + 1):
+        term = "hello world"[:i]
+        searchtime = int(rng.integers(0, 3)) + nrlines // (2000 * i)
+        nrresults = max(1, nrresults // 2)
+        if not native:
+            lines.extend([event("Result ready to send", searchtime),
+                          event("Search done", 1)])
+        lines.extend([
+            f"Searching for '{term}' resulted in {nrresults} results.",
+            f"--- ../{nrlines}.txt {searchtime} {searchtime} {term}",
+            # equal for all types, like the real logs (see base.checkHashes)
+            f"hash: {hashlib.sha1(f'{nrlines} {term}'.encode()).hexdigest()}",
+            f"+++ filename {searchtime // 2} {searchtime // 2} {term}",
+        ])
+        if not native:
+            lines.append(event("Result sent", 0))
+    lines.extend([
+        '\tCommand being timed: "./main"',
+        f"\tMaximum resident set size (kbytes): {8000 + nrlines // 10}",
+    ])
+    return lines
+
+
+def write_synthetic_log(filename: pathlib.Path, nrlines: int,
+                        seed: int = 0) -> int:
+    """Writes runs to `filename` until it has at least `nrlines` lines"""
+    rng = np.random.default_rng(seed)
+    written = 0
+    start_ms = 1629464522111
+    with open(filename, "w") as f:
+        while written < nrlines:
+            for exp in SYNTHETIC_NRLINES_EXP:
+                for fzf_type in SYNTHETIC_TYPES:
+                    lines = synthetic_run(rng, fzf_type, 2**exp, start_ms)
+                    f.write("\n".join(lines))
+                    f.write("\n")
+                    written += len(lines)
+                    start_ms += 1000
+    return written
+
+
+class Timer:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.timings: t.MutableMapping[str, float] = {}
+
+    def time(self, stage: str, func: t.Callable[[], t.Any],
+             setup: t.Callable[[], t.Any] = lambda: None) -> t.Any:
+        best = float("inf")
+        for _ in range(self.repeat):
+            setup()
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        self.timings[stage] = best
+        return result
+
+
+def benchmark(nrlines: int, repeat: int, workdir: pathlib.Path
+              ) -> t.Mapping[str, float]:
+    logfile = workdir / f"synthetic-{nrlines}.txt"
+    write_synthetic_log(logfile, nrlines)
+    timer = Timer(repeat)
+
+    base = timer.time("exec base.py", load_base)
+    base.RESULTS_FILENAMES = (logfile, )
+    base.CACHE_DIR = workdir / ".cache"
+    table = timer.time("parse", lambda: base.parseRunTable(logfile))
+    index = base.loadRunIndex(logfile)
+    timer.time("parse chunked", lambda: base.parseFileRanges(
+        [(logfile, index.ranges(index.select()))]))
+    keys = [base.TYPE_MAP[fzf_type] for fzf_type in SYNTHETIC_TYPES]
+    nrlinesexp = np.array(SYNTHETIC_NRLINES_EXP)
+    values = np.column_stack([table.runs["fzf_init_time_ms"],
+                              table.search_time_ms]) / 1000
+    timer.time("aggregate", lambda: base.aggregateRuns(
+        table, values, keys, 2**nrlinesexp, where=~table.runs["aborted"]))
+
+    base.loadRunTable()  # warm the dataset store, so plot excludes parsing
+    figures = []
+
+    def new_figure():
+        fig, ax = plt.subplots(figsize=(8, 6), facecolor="#f3f3f3")
+        figures.append((fig, ax))
+
+    tabledata = timer.time("plot", lambda: base.do_create_table_and_plot(
+        figures[-1][1],
+        nrlinesexp,
+        lambda table: np.column_stack([
+            table.runs["fzf_init_time_ms"], table.search_time_ms]) / 1000,
+        to_show=keys,
+        colourmap=[2] + [0] * len("hello") + [1] * len(" world"),
+        ylim=(0, 100),
+    ), setup=new_figure)
+    fig = figures[-1][0]
+    timer.time("tight_layout", lambda: fig.tight_layout(pad=.2))
+    timer.time("savefig", lambda: fig.savefig(io.BytesIO(), format="svg"))
+    timer.time("write table",
+               lambda: (workdir / "table.md").write_text(tabledata))
+    for fig, _ax in figures:
+        plt.close(fig)
+    dataset.clear()
+    return timer.timings
+
+
+def compare(results: t.Mapping[str, t.Mapping[str, float]],
+            baseline: t.Mapping[str, t.Mapping[str, float]],
+            tolerance: float, noise_seconds: float = 0.005) -> bool:
+    """Logs every stage's change against the baseline; False on regressions"""
+    ok = True
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            if (before := baseline.get(size, {}).get(stage)) is None:
+                continue
+            ratio = seconds / before if before else float("inf")
+            regression = (ratio > 1 + tolerance
+                          and seconds - before > noise_seconds)
+            ok &= not regression
+            (logger.warning if regression else logger.info)(
+                "%9s lines %-14s %8.4f s -> %8.4f s (%+.0f%%)%s",
+                size, stage, before, seconds, (ratio - 1) * 100,
+                "  REGRESSION" if regression else "")
+    return ok
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000],
+                        help="Sizes (in lines) of the synthetic logs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=pathlib.Path,
+                        help="Write the timings to this JSON file")
+    parser.add_argument("--baseline", type=pathlib.Path,
+                        help="Compare to the timings in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline")
+    parser.add_argument("--noise", type=float, default=0.005,
+                        help="Slowdowns below this many seconds are ignored")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for nrlines in args.lines:
+            results[str(nrlines)] = timings = benchmark(
+                nrlines, args.repeat, pathlib.Path(workdir))
+            for stage, seconds in timings.items():
+                logger.info("%9d lines %-14s %8.4f s", nrlines, stage, seconds)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        logger.info("Wrote %s", args.output)
+    if args.baseline:
+        if not compare(results, json.loads(args.baseline.read_text()),
+                       args.tolerance, args.noise):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
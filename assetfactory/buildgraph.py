@@ -0,0 +1,150 @@
+"""
+Finds every plot script under images/ (the modules that define create_plot)
+and what they depend on, for `main.py --all`.
+
+Dependencies are found without running anything: string literals in a script
+that name an existing file next to it (like "base.py" or a results log), and
+imports of modules in the assetfactory directory, followed recursively
+through helper modules. Inputs recorded in the build manifest are added to
+those. Helper modules that define `prepare()` get it called once, before the
+first chart that depends on them is rendered, so that their (shared) data is
+loaded once instead of by every chart.
+"""
+from __future__ import annotations
+import ast
+import graphlib
+import importlib
+import logging
+import pathlib
+import typing as t
+
+import manifest
+
+logger = logging.getLogger()
+
+HERE = pathlib.Path(__file__).resolve().parent
+IMAGES = HERE / "images"
+
+
+def _parse(filename: pathlib.Path) -> t.Optional[ast.Module]:
+    try:
+        return ast.parse(filename.read_text(), str(filename))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        # a missing or unreadable script is reported when it is processed
+        logger.warning("Cannot parse %s", filename)
+        return None
+
+
+def _defines(tree: ast.Module, name: str) -> bool:
+    return any(isinstance(node, ast.FunctionDef) and node.name == name
+               for node in tree.body)
+
+
+def is_plot_script(filename: pathlib.Path) -> bool:
+    tree = _parse(filename)
+    return tree is not None and _defines(tree, "create_plot")
+
+
+def find_plot_scripts(root: pathlib.Path = IMAGES) -> t.Sequence[pathlib.Path]:
+    return sorted(filename.resolve() for filename in root.rglob("*.py")
+                  if is_plot_script(filename))
+
+
+def static_dependencies(filename: pathlib.Path) -> t.Set[pathlib.Path]:
+    """The files that `filename` names or imports (see module docstring)"""
+    tree = _parse(filename)
+    if tree is None:
+        return set()
+    result = set()
+    for node in ast.walk(tree):
+        candidates = []
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if node.value and "/" not in node.value and "\n" not in node.value:
+                candidates.append(filename.parent / node.value)
+        elif isinstance(node, ast.Import):
+            candidates.extend(HERE / f"{alias.name.split('.')[0]}.py"
+                              for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            candidates.append(HERE / f"{node.module.split('.')[0]}.py")
+        result.update(candidate.resolve() for candidate in candidates
+                      if candidate.is_file())
+    result.discard(filename)
+    return result
+
+
+def all_dependencies(filename: pathlib.Path) -> t.Set[pathlib.Path]:
+    """
+    static_dependencies of `filename`, and recursively of those. Imported
+    helper modules are only read on their first import in a process, so
+    this is how a script's build record gets them as inputs.
+    """
+    result: t.Set[pathlib.Path] = set()
+    pending = [filename.resolve()]
+    while pending:
+        dependencies = static_dependencies(pending.pop()) - result
+        result.update(dependencies)
+        pending.extend(path for path in dependencies if path.suffix == ".py")
+    result.discard(filename.resolve())
+    return result
+
+
+class BuildGraph:
+    """
+    Plot scripts, and the files (helpers, data) that they and their helpers
+    depend on.
+    """
+    def __init__(self, scripts: t.Iterable[pathlib.Path],
+                 buildmanifest: t.Optional[manifest.Manifest] = None):
+        self.scripts = list(scripts)
+        self.dependencies: t.MutableMapping[
+            pathlib.Path, t.Set[pathlib.Path]] = {}
+        pending = list(self.scripts)
+        while pending:
+            filename = pending.pop()
+            if filename in self.dependencies:
+                continue
+            dependencies = set()
+            if filename.suffix == ".py":
+                dependencies = static_dependencies(filename)
+                if buildmanifest is not None and filename in self.scripts:
+                    dependencies.update(
+                        path.resolve() for path
+                        in buildmanifest.inputs(filename) if path.is_file())
+                dependencies.discard(filename)
+            self.dependencies[filename] = dependencies
+            pending.extend(dependencies)
+
+    def helpers(self) -> t.Sequence[pathlib.Path]:
+        """Modules that plot scripts depend on and that define prepare()"""
+        return [filename for filename in self.dependencies
+                if filename.suffix == ".py" and filename not in self.scripts
+                and (tree := _parse(filename)) is not None
+                and _defines(tree, "prepare")]
+
+    def schedule(self) -> t.Sequence[pathlib.Path]:
+        """
+        All helpers to prepare and scripts to render, dependencies first;
+        scripts that share a helper are kept together.
+        """
+        helpers = set(self.helpers())
+        sorter = graphlib.TopologicalSorter({
+            filename: dependencies
+            for filename, dependencies in self.dependencies.items()})
+        order = [filename for filename in sorter.static_order()
+                 if filename in helpers or filename in self.scripts]
+
+        def group(filename: pathlib.Path) -> t.Tuple[int, str]:
+            if filename in helpers:
+                return order.index(filename), ""
+            needed = [order.index(helper) for helper
+                      in self.dependencies[filename] & helpers]
+            return max(needed, default=-1), str(filename)
+        return sorted(order, key=group)
+
+
+def prepare(helper: pathlib.Path) -> None:
+    """Runs `prepare()` of a helper module, loaded as the scripts load it"""
+    spec = importlib.util.spec_from_file_location(helper.stem, helper)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.prepare()
@@ -0,0 +1,338 @@
+"""
+Compares two sets of fzf benchmark results (for instance before and after a
+library change), matching runs by fzf_type, haystack size and search term.
+
+    python compare.py --baseline results-native-2.txt \
+        --candidate results-new.txt --output comparison
+
+For every implementation and haystack size that is in both sets, the time
+spent in every phase (see base.phaseDurations) and in every search is
+compared, with a permutation test for the difference in means. Since
+that is hundreds of tests, their p-values are adjusted for multiple
+comparisons (Benjamini-Hochberg), so that of the changes reported as
+significant at --alpha, about that fraction is expected to be false.
+Searches whose number of results or hash differs between the sets are
+listed separately. Writes <output>.md (report) and <output>.svg (chart).
+"""
+from __future__ import annotations
+import argparse
+import logging
+import pathlib
+import typing as t
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.patches
+import matplotlib.pyplot as plt
+import numpy as np
+
+import output
+from benchmark import load_base
+
+logger = logging.getLogger()
+
+# permutations are drawn in batches of PERMUTATIONS, until MIN_EXTREME of
+# them differ at least as much as the samples (the p-value is then known
+# well enough) or MAX_PERMUTATIONS are drawn. After the adjustment for
+# hundreds of tests, only p-values far below 1 / PERMUTATIONS can be
+# significant, which the large differences need MAX_PERMUTATIONS for.
+PERMUTATIONS = 2000
+MAX_PERMUTATIONS = 50000
+MIN_EXTREME = 10
+
+
+class Difference(t.NamedTuple):
+    fzf_type: str
+    nrlines: int
+    metric: str
+    baseline_ms: float
+    candidate_ms: float
+    # adjusted for all differences together, see adjust_p_values
+    p_value: float
+
+    @property
+    def speedup(self) -> float:
+        """> 1 if the candidate is faster; inf if it takes no time at all"""
+        if self.candidate_ms == 0:
+            return np.inf
+        return self.baseline_ms / self.candidate_ms
+
+    def significant(self, alpha: float) -> bool:
+        return self.p_value < alpha
+
+
+class Mismatch(t.NamedTuple):
+    fzf_type: str
+    nrlines: int
+    term: str
+    baseline: t.Tuple[int, str]
+    candidate: t.Tuple[int, str]
+
+
+def permutation_test(baseline: np.ndarray, candidate: np.ndarray,
+                     rng: np.random.Generator,
+                     permutations: int = PERMUTATIONS,
+                     max_permutations: int = MAX_PERMUTATIONS) -> float:
+    """
+    Two-sided p-value for the difference in means of two samples. The
+    permutations of a batch are drawn at once, as an argsort of random keys.
+    """
+    if len(baseline) < 2 or len(candidate) < 2:
+        return np.nan
+    combined = np.concatenate([baseline, candidate])
+    observed = abs(baseline.mean() - candidate.mean())
+    extreme = drawn = 0
+    while extreme < MIN_EXTREME and drawn < max_permutations:
+        shuffled = combined[np.argsort(
+            rng.random((permutations, len(combined))), axis=1)]
+        differences = np.abs(shuffled[:, :len(baseline)].mean(axis=1)
+                             - shuffled[:, len(baseline):].mean(axis=1))
+        # a little slack, so that exact ties are not missed due to rounding
+        extreme += np.count_nonzero(
+            differences >= observed - 1e-9 * abs(observed))
+        drawn += permutations
+    return (extreme + 1) / (drawn + 1)
+
+
+def adjust_p_values(p_values: np.ndarray) -> np.ndarray:
+    """
+    Benjamini-Hochberg adjusted p-values: p · m / rank, made monotone from
+    the largest p-value down. NaNs (groups too small to test) stay NaN, and
+    do not count for m.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(len(p_values), np.nan)
+    tested = np.flatnonzero(~np.isnan(p_values))
+    order = tested[np.argsort(p_values[tested])]
+    scaled = p_values[order] * len(order) / np.arange(1, len(order) + 1)
+    adjusted[order] = np.minimum(
+        np.minimum.accumulate(scaled[::-1])[::-1], 1)
+    return adjusted
+
+
+def group_runs(table) -> t.Mapping[t.Tuple[str, int], np.ndarray]:
+    """Indices of the runs (that were not aborted) per (fzf_type, nrlines)"""
+    valid = np.flatnonzero(~table.runs["aborted"])
+    keys = list(zip(table.runs["fzf_type"][valid].tolist(),
+                    table.runs["nrlines"][valid].astype(int).tolist()))
+    groups: t.MutableMapping[t.Tuple[str, int], t.List[int]] = {}
+    for key, index in zip(keys, valid.tolist()):
+        groups.setdefault(key, []).append(index)
+    return {key: np.array(indices) for key, indices in groups.items()}
+
+
+def most_common(values: t.Sequence[t.Tuple[int, str]]) -> t.Tuple[int, str]:
+    return max(set(values), key=values.count)
+
+
+def compare_tables(base, baseline, candidate, seed: int = 0
+                   ) -> t.Tuple[t.Sequence[Difference], t.Sequence[Mismatch],
+                                t.Sequence[t.Tuple[str, int, str]]]:
+    """
+    (differences per phase and search term, result mismatches, groups that
+    are only in one of the sets)
+    """
+    rng = np.random.default_rng(seed)
+    metrics = [*base.PHASES, "Total",
+               *[f"Search '{term}'" for term in base.SEARCH_TERMS]]
+
+    def measurements(table) -> np.ndarray:
+        phases = base.phaseDurations(table)
+        return np.column_stack([phases, phases.sum(axis=1),
+                                table.search_time_ms])
+
+    baselinegroups = group_runs(baseline)
+    candidategroups = group_runs(candidate)
+    baselinevalues = measurements(baseline)
+    candidatevalues = measurements(candidate)
+
+    differences = []
+    mismatches = []
+    for key in sorted(baselinegroups.keys() & candidategroups.keys()):
+        fzf_type, nrlines = key
+        before = baselinevalues[baselinegroups[key]]
+        after = candidatevalues[candidategroups[key]]
+        for index, metric in enumerate(metrics):
+            b = before[:, index][~np.isnan(before[:, index])]
+            a = after[:, index][~np.isnan(after[:, index])]
+            if not len(b) or not len(a) or (b.mean() == 0 and a.mean() == 0):
+                continue
+            differences.append(Difference(
+                fzf_type, nrlines, metric, b.mean(), a.mean(),
+                permutation_test(b, a, rng)))
+        for index, term in enumerate(base.SEARCH_TERMS):
+            results = [
+                most_common(list(zip(
+                    table.nrresults[groups[key], index].tolist(),
+                    table.hashes[groups[key], index].tolist())))
+                for table, groups in ((baseline, baselinegroups),
+                                      (candidate, candidategroups))]
+            if results[0] != results[1]:
+                mismatches.append(Mismatch(fzf_type, nrlines, term, *results))
+    unmatched = [
+        (fzf_type, nrlines, which)
+        for which, groups, other in (
+            ("baseline", baselinegroups, candidategroups),
+            ("candidate", candidategroups, baselinegroups))
+        for fzf_type, nrlines in sorted(groups.keys() - other.keys())]
+    adjusted = adjust_p_values([d.p_value for d in differences])
+    differences = [d._replace(p_value=p_value)
+                   for d, p_value in zip(differences, adjusted.tolist())]
+    return differences, mismatches, unmatched
+
+
+def markdown_report(base, differences: t.Sequence[Difference],
+                    mismatches: t.Sequence[Mismatch],
+                    unmatched: t.Sequence[t.Tuple[str, int, str]],
+                    baseline: t.Sequence[pathlib.Path],
+                    candidate: t.Sequence[pathlib.Path],
+                    alpha: float) -> str:
+    significant = [d for d in differences if d.significant(alpha)]
+    faster = sum(d.speedup > 1 for d in significant)
+
+    def size(nr: int) -> str:
+        return f"2<sup>{base.LOG2_MAP.get(nr, np.log2(nr))}</sup> = {nr}"
+
+    def difference_table(rows: t.Sequence[Difference]) -> t.List[str]:
+        if not rows:
+            return ["None."]
+        return [
+            "|".join(["Implementation", "Haystack size", "Measurement",
+                      "Baseline (ms)", "Candidate (ms)", "Speedup", "p"]),
+            "|".join(["---"] * 7),
+            *["|".join([d.fzf_type, size(d.nrlines), d.metric,
+                        f"{d.baseline_ms:.2f}", f"{d.candidate_ms:.2f}",
+                        f"{d.speedup:.2f}×" if np.isfinite(d.speedup)
+                        else "---", f"{d.p_value:.4f}"])
+              for d in rows],
+        ]
+
+    lines = [
+        "# Benchmark comparison",
+        "",
+        f"Baseline: {', '.join(path.name for path in baseline)}  ",
+        f"Candidate: {', '.join(path.name for path in candidate)}",
+        "",
+        f"{len(significant)} of {len(differences)} measurements changed "
+        f"significantly (permutation test, Benjamini-Hochberg adjusted "
+        f"p < {alpha}): {faster} faster, "
+        f"{len(significant) - faster} slower.",
+        "",
+        "## Phases",
+        "",
+        *difference_table([d for d in significant
+                           if not d.metric.startswith("Search '")]),
+        "",
+        "## Searches",
+        "",
+        *difference_table([d for d in significant
+                           if d.metric.startswith("Search '")]),
+        "",
+        "## Result mismatches",
+        "",
+    ]
+    if mismatches:
+        lines.extend([
+            "|".join(["Implementation", "Haystack size", "Search term",
+                      "Baseline results", "Candidate results",
+                      "Baseline hash", "Candidate hash"]),
+            "|".join(["---"] * 7),
+            *["|".join([m.fzf_type, size(m.nrlines), f"'{m.term}'",
+                        f"{m.baseline[0]:.0f}", f"{m.candidate[0]:.0f}",
+                        m.baseline[1] or "---", m.candidate[1] or "---"])
+              for m in mismatches],
+        ])
+    else:
+        lines.append("None.")
+    if unmatched:
+        lines.extend([
+            "",
+            "## Not in both sets",
+            "",
+            *[f"- {fzf_type}, {size(nrlines)} (only in {which})"
+              for fzf_type, nrlines, which in unmatched],
+        ])
+    return "\n".join(lines) + "\n"
+
+
+def create_plot(base, ax, differences: t.Sequence[Difference],
+                alpha: float) -> None:
+    """
+    Speedup of the total time per implementation and haystack size; changes
+    that are not significant are drawn faded, infinite ones are left out.
+    """
+    totals = [d for d in differences
+              if d.metric == "Total" and np.isfinite(d.speedup)]
+    fzf_types = sorted({d.fzf_type for d in totals})
+    nrlines = sorted({d.nrlines for d in totals})
+    width = 0.9 / max(len(fzf_types), 1)
+    handles = []
+    for typeindex, fzf_type in enumerate(fzf_types):
+        rows = [d for d in totals if d.fzf_type == fzf_type]
+        x = np.array([nrlines.index(d.nrlines) for d in rows])
+        speedups = np.array([d.speedup for d in rows])
+        colour = base.COLOUR_MAP.get(fzf_type, ("#999999",))[0]
+        ax.bar(x - 0.45 + (typeindex + .5) * width,
+               speedups - 1,
+               bottom=1,
+               width=width,
+               color=[colour if d.significant(alpha) else colour + "55"
+                      for d in rows])
+        handles.append(matplotlib.patches.Patch(color=colour, label=fzf_type))
+    ax.axhline(1, color="#333333", linewidth=.8)
+    ax.set_xticks(np.arange(len(nrlines)))
+    ax.set_xticklabels([f"$2^{{{int(np.log2(nr))}}}$" for nr in nrlines],
+                       rotation=45)
+    ax.set_title("Speedup of the candidate (faded: not significant)")
+    ax.set_xlabel("Haystack size")
+    ax.set_ylabel("Baseline time / candidate time")
+    ax.legend(handles=handles)
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", type=pathlib.Path, nargs="+",
+                        required=True)
+    parser.add_argument("--candidate", type=pathlib.Path, nargs="+",
+                        required=True)
+    parser.add_argument("--output", type=pathlib.Path,
+                        default=pathlib.Path("comparison"),
+                        help="Writes <output>.md and <output>.svg")
+    parser.add_argument("--alpha", type=float, default=0.01,
+                        help="Significance level of the (adjusted) p-values")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    base = load_base()
+    tables = base.loadRunTableFiles([*args.baseline, *args.candidate])
+    baseline = base.RunTable.concatenate(tables[:len(args.baseline)])
+    candidate = base.RunTable.concatenate(tables[len(args.baseline):])
+    differences, mismatches, unmatched = compare_tables(
+        base, baseline, candidate, args.seed)
+
+    report = markdown_report(base, differences, mismatches, unmatched,
+                             args.baseline, args.candidate, args.alpha)
+    args.output.with_suffix(".md").write_text(report)
+    logger.info("Wrote %s", args.output.with_suffix(".md"))
+
+    fig, ax = plt.subplots(figsize=(8, 6), facecolor="#f3f3f3")
+    ax.set_facecolor("#f3f3f3")
+    create_plot(base, ax, differences, args.alpha)
+    fig.tight_layout(pad=.2)
+    output.save_figure(fig, args.output, ("svg", ))
+    plt.close(fig)
+
+    significant = [d for d in differences if d.significant(args.alpha)]
+    for d in significant:
+        if d.metric == "Total":
+            logger.info("%-24s %9d lines: %.2f× %s (p = %.4f)",
+                        d.fzf_type, d.nrlines, d.speedup,
+                        "faster" if d.speedup > 1 else "slower", d.p_value)
+    logger.info("%d of %d measurements changed significantly, "
+                "%d result mismatches", len(significant), len(differences),
+                len(mismatches))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,47 @@
+"""
+Process-wide store for data that plot scripts load, like parsed benchmark
+results.
+
+Every plot script executes its own copy of helper modules such as base.py, so
+anything those keep in module globals is gone by the next script. Data kept
+here survives between scripts in one build, and between renders in --watch
+mode.
+"""
+from __future__ import annotations
+import pathlib
+import sys
+import typing as t
+
+T = t.TypeVar("T")
+
+# audit event for files that a script depends on without opening them (since
+# their data came from this store); picked up by manifest.record_inputs()
+INPUT_EVENT = "assetfactory.input"
+
+_store: t.MutableMapping[str, t.Tuple[t.Hashable, t.Any]] = {}
+
+
+def cached(name: str, stamp: t.Hashable, loader: t.Callable[[], T],
+           inputs: t.Iterable[pathlib.Path] = ()) -> T:
+    """
+    The value that `loader` returned for `name`, as long as `stamp` (for
+    instance the size and mtime of the file that is loaded) did not change.
+    """
+    for path in inputs:
+        sys.audit(INPUT_EVENT, str(path))
+    if name in _store and _store[name][0] == stamp:
+        return _store[name][1]
+    value = loader()
+    _store[name] = (stamp, value)
+    return value
+
+
+def get(name: str, stamp: t.Hashable) -> t.Optional[t.Any]:
+    """The value stored for `name` with `stamp`, or None"""
+    if name in _store and _store[name][0] == stamp:
+        return _store[name][1]
+    return None
+
+
+def clear() -> None:
+    _store.clear()
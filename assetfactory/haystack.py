@@ -0,0 +1,159 @@
+"""
+Generates the haystacks that the benchmarks search in: <nrlines>.txt files
+of random lines made of words from VOCABULARY:
+
+    python haystack.py --sizes 10 11 12 --haystack-dir ..
+
+The lines only depend on --seed and their position, so every smaller
+haystack is a prefix of the larger ones, whichever sizes are generated.
+
+The lines are not like the (Linux source) lines of the 2021/08/30 results,
+and neither are their fuzzy match rates. Those of the logged haystacks vary
+a lot with their size, since the source is not the same throughout; the
+generated lines are, so their rates are about the same for every size. For
+the prefixes of "hello world", the fraction of lines that match (generated,
+2^20 lines, seed 0, against the median and range over the logged sizes, and
+the logged 2^10 lines):
+
+    term            generated   logged median (range)       2^10
+    h               0.42        0.39 (0.22-0.72)            0.22
+    hel             0.12        0.17 (0.078-0.38)           0.078
+    hello           0.032       0.044 (0.016-0.097)         0.033
+    hello w         0.017       0.020 (0.0076-0.042)        0.020
+    hello world     0.0039      0.0027 (0.0002-0.010)       0.0010
+
+So against the logged 2^10 lines, the generated lines match about 2x ("h")
+to 4x ("hello world") as often; against the median, "hel" to "hello" match
+about 30% less often and "hello world" about 40% more often.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import pathlib
+import time
+import typing as t
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# lines are generated in blocks of this many, every block with its own seed
+BLOCK_LINES = 2 ** 16
+WRITE_BUFFER = 2 ** 22
+
+# roughly by frequency in C source and comments; the relative weight of a
+# word is 1 / (rank + 1)
+VOCABULARY = """
+= ; { } ( ) the int if return * struct to -> a of 0 static is for void
+#include and this in i NULL 1 be const unsigned err case else ret
+break dev data u32 by not size len with are it sizeof char val on that
+value buf reg long from u8 count flags index type list as at or goto out
+page addr mask lock state node entry offset base irq info priv config
+device driver buffer table map bit init free alloc read set get
+start end next prev mode status error check update enable disable
+define #define ifdef endif u16 u64 bool true false kernel file inode
+should will when can we all only used must may any new old other
+see also which there then have has been was were each more
+handle handler hash head header hold host hw high hook hot hint hit
+help hex hier hyp hrtimer hdr hsize hlist hole hops hwmod
+them these those through while where whether without within what
+world work word worker workqueue would write wait wake watch walk
+well level label left line load local lower last link
+hello
+""".split()
+
+
+# words are drawn by a uniform 16 bit index into a table in which every word
+# occurs in proportion to its weight, which is a lot faster than rng.choice()
+TABLE_BITS = 16
+
+
+def word_table(nrwords: int) -> np.ndarray:
+    """Word numbers, word i about 2^TABLE_BITS / (i + 1) / H(nrwords) times"""
+    weights = 1 / np.arange(1, nrwords + 1)
+    counts = np.round(weights / weights.sum() * 2 ** TABLE_BITS).astype(int)
+    counts[0] += 2 ** TABLE_BITS - counts.sum()
+    return np.repeat(np.arange(nrwords), counts)
+
+
+class Model:
+    """The vocabulary as one byte array, with a trailing space per word"""
+    def __init__(self, vocabulary: t.Sequence[str] = VOCABULARY,
+                 mean_words: float = 7):
+        words = [f"{word} ".encode() for word in vocabulary]
+        self.chars = np.frombuffer(b"".join(words), dtype=np.uint8)
+        self.lengths = np.array([len(word) for word in words], dtype=np.int32)
+        self.starts = np.cumsum(self.lengths, dtype=np.int32) - self.lengths
+        self.table = word_table(len(words))
+        self.mean_words = mean_words
+
+    def block(self, seed: int, block: int) -> bytes:
+        """The BLOCK_LINES lines of block number `block`, as bytes"""
+        rng = np.random.default_rng([seed, block])
+        nrwords = rng.geometric(1 / self.mean_words, size=BLOCK_LINES)
+        words = self.table[rng.integers(0, 2 ** TABLE_BITS,
+                                        size=nrwords.sum(), dtype=np.uint16)]
+        lengths = self.lengths[words]
+        ends = np.cumsum(lengths)
+        starts = self.starts[words]
+        # the position in self.chars of every output byte is the running sum
+        # of these steps: 1 within a word, and a jump at every word start
+        steps = np.ones(ends[-1], dtype=np.int32)
+        steps[0] = starts[0]
+        steps[ends[:-1]] = starts[1:] - (starts[:-1] + lengths[:-1] - 1)
+        chars = self.chars[np.cumsum(steps, dtype=np.int32)]
+        # the space after the last word of every line becomes the newline
+        chars[ends[np.cumsum(nrwords) - 1] - 1] = ord("\n")
+        return chars.tobytes()
+
+
+def write_haystacks(directory: pathlib.Path, nrlines: t.Sequence[int],
+                    seed: int = 0, model: t.Optional[Model] = None
+                    ) -> t.Sequence[pathlib.Path]:
+    """
+    Writes <n>.txt in `directory` for every n in `nrlines`; all of them in one
+    pass, since the smaller ones are prefixes of the larger ones.
+    """
+    model = model or Model()
+    directory.mkdir(parents=True, exist_ok=True)
+    filenames = [directory / f"{n}.txt" for n in nrlines]
+    files = [open(filename, "wb", buffering=WRITE_BUFFER)
+             for filename in filenames]
+    try:
+        for block in range(-(-max(nrlines) // BLOCK_LINES)):
+            data = model.block(seed, block)
+            first = block * BLOCK_LINES
+            for n, f in zip(nrlines, files):
+                if n >= first + BLOCK_LINES:
+                    f.write(data)
+                elif n > first:
+                    # the newline that ends line n - first
+                    ends = np.flatnonzero(
+                        np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+                    f.write(data[:ends[n - first - 1] + 1])
+    finally:
+        for f in files:
+            f.close()
+    return filenames
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(range(10, 26)),
+                        help="Haystack sizes, as powers of 2")
+    parser.add_argument("--haystack-dir", type=pathlib.Path,
+                        default=pathlib.Path(".."))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    filenames = write_haystacks(args.haystack_dir,
+                                [2 ** exp for exp in args.sizes], args.seed)
+    logger.info("Wrote %s in %.1f s", ", ".join(map(str, filenames)),
+                time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    run()
@@ -1,6 +1,8 @@
 import numpy as np
 from matplotlib.ticker import FuncFormatter
 
+import scaling
+
 
 def formatter(nr, _pos):
     mapping = [
@@ -44,6 +46,14 @@ def create_plot(ax):
     ax.set_xscale('log')
     ax.bar(x-x/8, y1, width=x/4, label="time fzf-lib")
     ax.bar(x+x/8, y2, width=x/4, label="time fzf cmdline")
+    # extrapolate the sizes before the knee, to show where fzf-lib leaves
+    # its linear behaviour
+    knee = scaling.knee(x, y1)
+    linear = x < knee if knee else np.ones_like(x, dtype=bool)
+    fit = scaling.fit(x[linear], y1[linear], "a + b·n")
+    ax.plot(x - x/8, fit.predict(x),
+            color="#333333", linestyle="--", linewidth=1,
+            label=f"fzf-lib, linear fit up to {formatter(x[linear][-1], None)}")
     ax.xaxis.set_major_formatter(FuncFormatter(formatter))
     ax.yaxis.set_major_formatter(FuncFormatter(formatter))
     ax.set_xlabel("Size of the haystack")
@@ -1,119 +1,162 @@
 from __future__ import annotations
+import bz2
+import collections.abc
+import datetime
+import functools
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import multiprocessing
+import os
 import pathlib
+import queue
+import re
+import shutil
+import traceback
 import typing as t
 
+import matplotlib.patches
 import numpy as np
 
+try:
+    import dataset
+except ImportError:  # not loaded through assetfactory/main.py
+    dataset = None
+try:
+    import scaling
+except ImportError:  # only needed for fit_scaling
+    scaling = None
+
 import math
 
-def rgb_to_hsv(r, g, b):
-    r = float(r)
-    g = float(g)
-    b = float(b)
-    high = max(r, g, b)
-    low = min(r, g, b)
-    h, s, v = high, high, high
+def _hue(rgbs: np.ndarray, high: np.ndarray, d: np.ndarray) -> np.ndarray:
+    r, g, b = np.moveaxis(rgbs, -1, 0)
+    safe_d = np.where(d == 0, 1, d)
+    # when several channels equal the maximum, the first one (r, g, b) wins
+    h = np.select(
+        [d == 0, r == high, g == high],
+        [0.0, (g - b) / safe_d + np.where(g < b, 6, 0), (b - r) / safe_d + 2],
+        (r - g) / safe_d + 4)
+    return h / 6
 
-    d = high - low
-    s = 0 if high == 0 else d/high
-
-    if high == low:
-        h = 0.0
-    else:
-        h = {
-            r: (g - b) / d + (6 if g < b else 0),
-            g: (b - r) / d + 2,
-            b: (r - g) / d + 4,
-        }[high]
-        h /= 6
 
-    return h, s, v
+def rgbs_to_hsvs(rgbs: np.ndarray) -> np.ndarray:
+    """Converts an N×3 array of rgb values (0 - 1) to an N×3 array of hsv"""
+    rgbs = np.asarray(rgbs, dtype=float)
+    high = rgbs.max(axis=-1)
+    low = rgbs.min(axis=-1)
+    d = high - low
+    s = np.divide(d, high, out=np.zeros_like(d), where=high != 0)
+    return np.stack([_hue(rgbs, high, d), s, high], axis=-1)
 
-def hsv_to_rgb(h, s, v):
-    i = math.floor(h*6)
-    f = h*6 - i
-    p = v * (1-s)
-    q = v * (1-f*s)
-    t = v * (1-(1-f)*s)
 
-    r, g, b = [
+def hsvs_to_rgbs(hsvs: np.ndarray) -> np.ndarray:
+    h, s, v = np.moveaxis(np.asarray(hsvs, dtype=float), -1, 0)
+    i = np.floor(h * 6)
+    f = h * 6 - i
+    p = v * (1 - s)
+    q = v * (1 - f * s)
+    t = v * (1 - (1 - f) * s)
+    candidates = np.stack([np.stack(rgb, axis=-1) for rgb in [
         (v, t, p),
         (q, v, p),
         (p, v, t),
         (p, q, v),
         (t, p, v),
         (v, p, q),
-    ][int(i%6)]
+    ]])
+    return np.choose((i.astype(int) % 6)[..., np.newaxis], candidates)
 
-    return r, g, b
 
-def rgb_to_hsl(r, g, b):
-    r = float(r)
-    g = float(g)
-    b = float(b)
-    high = max(r, g, b)
-    low = min(r, g, b)
-    h, s, l = ((high + low) / 2,)*3
-
-    if high == low:
-        h = 0.0
-        s = 0.0
-    else:
-        d = high - low
-        s = d / (2 - high - low) if l > 0.5 else d / (high + low)
-        h = {
-            r: (g - b) / d + (6 if g < b else 0),
-            g: (b - r) / d + 2,
-            b: (r - g) / d + 4,
-        }[high]
-        h /= 6
+def rgbs_to_hsls(rgbs: np.ndarray) -> np.ndarray:
+    """Converts an N×3 array of rgb values (0 - 1) to an N×3 array of hsl"""
+    rgbs = np.asarray(rgbs, dtype=float)
+    high = rgbs.max(axis=-1)
+    low = rgbs.min(axis=-1)
+    d = high - low
+    l = (high + low) / 2
+    denominator = np.where(l > 0.5, 2 - high - low, high + low)
+    s = np.divide(d, denominator, out=np.zeros_like(d), where=d != 0)
+    return np.stack([_hue(rgbs, high, d), s, l], axis=-1)
 
-    return h, s, l
 
-def hsl_to_rgb(h, s, l):
-    def hue_to_rgb(p, q, t):
-        t += 1 if t < 0 else 0
-        t -= 1 if t > 1 else 0
-        if t < 1/6: return p + (q - p) * 6 * t
-        if t < 1/2: return q
-        if t < 2/3: return p + (q - p) * (2/3 - t) * 6
-        return p
-
-    if s == 0:
-        r, g, b = l, l, l
-    else:
-        q = l * (1 + s) if l < 0.5 else l + s - l * s
-        p = 2 * l - q
-        r = hue_to_rgb(p, q, h + 1/3)
-        g = hue_to_rgb(p, q, h)
-        b = hue_to_rgb(p, q, h - 1/3)
+def hsls_to_rgbs(hsls: np.ndarray) -> np.ndarray:
+    h, s, l = np.moveaxis(np.asarray(hsls, dtype=float), -1, 0)
+    q = np.where(l < 0.5, l * (1 + s), l + s - l * s)
+    p = 2 * l - q
 
-    return r, g, b
+    def hue_to_rgb(t):
+        t = np.where(t < 0, t + 1, t)
+        t = np.where(t > 1, t - 1, t)
+        return np.select(
+            [t < 1/6, t < 1/2, t < 2/3],
+            [p + (q - p) * 6 * t, q, p + (q - p) * (2/3 - t) * 6],
+            p)
 
+    rgbs = np.stack(
+        [hue_to_rgb(h + 1/3), hue_to_rgb(h), hue_to_rgb(h - 1/3)], axis=-1)
+    return np.where((s == 0)[..., np.newaxis], l[..., np.newaxis], rgbs)
 
-def hex_to_rgb(rgb: str) -> t.Tuple[float, float, float]:
-    assert rgb[0] == "#"
-    if len(rgb) == len("#rgb"):
-        elementlength = 1
-    else:
+
+def hexes_to_rgbs(hexes: t.Sequence[str]) -> np.ndarray:
+    """Converts "#rgb" / "#rrggbb" strings to an N×3 array of rgb (0 - 1)"""
+    values = []
+    for rgb in hexes:
+        assert rgb[0] == "#"
+        if len(rgb) == len("#rgb"):
+            rgb = "#" + "".join(c * 2 for c in rgb[1:])
         assert len(rgb) == len("#rrggbb")
-        elementlength = 2
-    return [int(rgb[i:i + elementlength], 16) / (16 ** elementlength - 1)
-            for i in range(1, len(rgb), elementlength)]
+        values.append(int(rgb[1:], 16))
+    values = np.array(values, dtype=np.int64)
+    return np.stack(
+        [(values >> shift) & 0xff for shift in (16, 8, 0)], axis=-1) / 255
+
+
+def rgbs_to_hexes(rgbs: np.ndarray) -> t.Sequence[str]:
+    rgbs = np.asarray(rgbs, dtype=float)
+    assert ((0 <= rgbs) & (rgbs <= 1)).all()
+    return ["#%02x%02x%02x" % tuple(rgb)
+            for rgb in np.round(rgbs * 255).astype(int).reshape(-1, 3).tolist()]
+
+
+def lighten(hexes: t.Sequence[str], pcts: t.Sequence[float]
+            ) -> t.Sequence[t.Sequence[str]]:
+    """
+    Every colour in `hexes` made lighter by every percentage in `pcts`, in a
+    single vectorized conversion; the result has one row per percentage.
+    """
+    pcts = np.asarray(pcts, dtype=float)
+    assert ((0 < pcts) & (pcts <= 100)).all()
+    hsls = np.broadcast_to(rgbs_to_hsls(hexes_to_rgbs(hexes)),
+                           (len(pcts), len(hexes), 3)).copy()
+    hsls[..., 2] = 1 - (1 - hsls[..., 2]) / (1 + pcts[:, np.newaxis] / 100)
+    colours = rgbs_to_hexes(hsls_to_rgbs(hsls))
+    return [colours[i * len(hexes):(i + 1) * len(hexes)]
+            for i in range(len(pcts))]
+
+
+def rgb_to_hsv(r, g, b):
+    return tuple(rgbs_to_hsvs([r, g, b]).tolist())
+
+def hsv_to_rgb(h, s, v):
+    return tuple(hsvs_to_rgbs([h, s, v]).tolist())
+
+def rgb_to_hsl(r, g, b):
+    return tuple(rgbs_to_hsls([r, g, b]).tolist())
+
+def hsl_to_rgb(h, s, l):
+    return tuple(hsls_to_rgbs([h, s, l]).tolist())
+
+def hex_to_rgb(rgb: str) -> t.Tuple[float, float, float]:
+    return tuple(hexes_to_rgbs([rgb])[0].tolist())
 
 def rgb_to_hex(r: float, g: float, b: float) -> str:
-    assert 0 <= r <= 1
-    assert 0 <= g <= 1
-    assert 0 <= b <= 1
-    return "#" + "".join(
-        "%02x" % int(round(c * 255)) for c in (r, g, b))
+    return rgbs_to_hexes([r, g, b])[0]
 
 def lighter(rgb: str, pct: float):
-    assert 0 < pct <= 100
-    r, g, b = hex_to_rgb(rgb)
-    h, s, l = rgb_to_hsl(r, g, b)
-    l = 1 - (1 - l) / (1 + pct / 100)
-    return rgb_to_hex(*hsl_to_rgb(h, s, l))
+    return lighten([rgb], [pct])[0][0]
 
 class RunDataNoMatchException(Exception):
     def __init__(self, runData: RunData):
@@ -135,7 +178,7 @@ TYPE_MAP = {
     "go-native-nogc": "Go (native; no GC)",
 }
 
-COLOUR_MAP = {
+BASE_COLOUR_MAP = {
     "Go (native)": ["#003f5c", "#668eaa", "#002633"],
     "Go (native; no GC)": ["#ffa600", "#ffcc33"],
     "Go (WebAssembly)": ["#58508d", "#9e94c5", "#262145"],
@@ -146,22 +189,127 @@ COLOUR_MAP = {
     "GopherJS": ["#ffa600", "#ffc171", "#cc5000"],
 }
 
-COLOUR_MAP = {
-    **COLOUR_MAP,
-    **{f"{key} - {browser}": [lighter(v, pct) for v in value]
-       for key, value in COLOUR_MAP.items()
-       for browser, pct in [
-           ("Firefox", 20),
-           ("Chrome", 40),
-           ("Safari", 60),
-           ("Edge", 80),
-       ]}
+BROWSER_LIGHTNESS_PCT = {
+    "Firefox": 20,
+    "Chrome": 40,
+    "Safari": 60,
+    "Edge": 80,
 }
 
+
+@functools.lru_cache(maxsize=None)
+def palette(key: str) -> t.Sequence[str]:
+    """
+    The colours for an fzf_type, possibly with a " - <Browser>" suffix; the
+    browser variants are calculated (and memoized) on first use.
+    """
+    if key in BASE_COLOUR_MAP:
+        return tuple(BASE_COLOUR_MAP[key])
+    base, _, browser = key.rpartition(" - ")
+    if base not in BASE_COLOUR_MAP or browser not in BROWSER_LIGHTNESS_PCT:
+        raise KeyError(key)
+    return tuple(lighten(BASE_COLOUR_MAP[base],
+                         [BROWSER_LIGHTNESS_PCT[browser]])[0])
+
+
+class Palette(collections.abc.Mapping):
+    """Mapping view of all fzf_type (× browser) colours, see palette()"""
+    def __getitem__(self, key: str) -> t.Sequence[str]:
+        return palette(key)
+
+    def __iter__(self) -> t.Iterator[str]:
+        yield from BASE_COLOUR_MAP
+        for key in BASE_COLOUR_MAP:
+            for browser in BROWSER_LIGHTNESS_PCT:
+                yield f"{key} - {browser}"
+
+    def __len__(self) -> int:
+        return len(BASE_COLOUR_MAP) * (1 + len(BROWSER_LIGHTNESS_PCT))
+
+
+COLOUR_MAP = Palette()
+
 LOG2_MAP = {2**i: i for i in range(40)}
 
 
-class RunData:
+class LogLines:
+    """
+    Forward reader over the lines of a results file with one line lookahead,
+    so that only the file's read buffer is held in memory.
+    """
+    def __init__(self, f: t.Iterable[str]):
+        self._lines = iter(f)
+        self._pending: t.MutableSequence[str] = []
+
+    def pop(self) -> str:
+        """Next line (without newline); IndexError at the end of the file"""
+        if self._pending:
+            return self._pending.pop()
+        try:
+            line = next(self._lines)
+        except StopIteration:
+            raise IndexError("pop from exhausted LogLines") from None
+        return line[:-1] if line.endswith("\n") else line
+
+    def peek(self) -> str:
+        """Next line without consuming it; "" at the end of the file"""
+        try:
+            line = self.pop()
+        except IndexError:
+            return ""
+        self.pushback(line)
+        return line
+
+    def pushback(self, line: str) -> None:
+        self._pending.append(line)
+
+
+# timestamped events in the logs ("<event> <epoch ms> <ms since start>"),
+# once per run, and once per search (for the implementations that log them)
+RUN_EVENTS = (
+    "start",
+    "js/wasm loaded",
+    "lines.txt loaded",
+    "startTimeSet",
+    "newStart",
+    "newFinishedParse",
+    "newDone",
+    "Fzf initialized",
+)
+SEARCH_EVENTS = (
+    "Result ready to send",
+    "Search done",
+    "Result sent",
+)
+
+
+def parseEvent(line: str) -> t.Optional[t.Tuple[str, int]]:
+    """(event, epoch ms) if `line` is a timestamped event, else None"""
+    parts = line.rsplit(" ", 2)
+    if len(parts) != 3 or not parts[1].isdigit() or len(parts[1]) != 13:
+        return None
+    name = parts[0]
+    if name.startswith("lines.txt loaded:"):
+        name = "lines.txt loaded"
+    if name not in RUN_EVENTS and name not in SEARCH_EVENTS:
+        return None
+    return name, int(parts[1])
+
+
+def fzfTypeLabel(raw_fzf_type: str) -> t.Tuple[str, bool]:
+    """(label, whether it ran in a browser) for a logged fzf-type"""
+    if any(raw_fzf_type.endswith(f"-{x}")
+           for x in ("edge", "safari", "firefox", "chrome")):
+        base, browser = raw_fzf_type.rsplit("-", 1)
+        return TYPE_MAP[base] + f" - {browser.capitalize()}", True
+    return TYPE_MAP[raw_fzf_type], False
+
+
+class ParsedRun:
+    """
+    A single run as it is read from a results file; see RunTable for the
+    representation that the plots use.
+    """
     fzf_type: str = None
     nrlines: int = None
     lines_load_time_ms: int = None
@@ -169,38 +317,50 @@ class RunData:
     memory_used_mib: float = None
     search_times_ms_nr_results: t.MutableMapping[str, t.Tuple[int, int]] = None
     aborted: bool
-    browser: bool
+    browser: bool = None
+    events: t.MutableMapping[str, int] = None
+    # (event, index of the search) -> epoch ms
+    search_events: t.MutableMapping[t.Tuple[str, int], int] = None
 
-    def popuntilstartmatch(self, lines: t.MutableSequence[str], start: str) -> str:
+    def recordevent(self, line: str) -> None:
+        if (event := parseEvent(line)) is None:
+            return
+        name, epoch_ms = event
+        if name in RUN_EVENTS:
+            self.events.setdefault(name, epoch_ms)
+        else:
+            # "Result sent" follows the search it belongs to, the others
+            # precede it
+            index = len(self.search_times_ms_nr_results) - (
+                name == "Result sent")
+            self.search_events.setdefault((name, index), epoch_ms)
+
+    def popuntilstartmatch(self, lines: LogLines, start: str) -> str:
         try:
             while not (line := lines.pop()).startswith(start):
+                self.recordevent(line)
                 if line.startswith("******"):
                     self.aborted = True
-                    lines.append(line)
+                    lines.pushback(line)
                     raise RunDataNoMatchException(self)
         except IndexError:
             self.aborted = True
             raise RunDataNoMatchException(self)
+        self.recordevent(line)
         return line
 
-    def __init__(self, lines: t.MutableSequence[str]):
+    def __init__(self, lines: LogLines):
         self.aborted = False
         self.search_times_ms_nr_results = {}
+        self.events = {}
+        self.search_events = {}
         try:
             while not (line := lines.pop()).startswith("******"):
                 pass
         except IndexError:
             raise RunDataOutOfLinesException()
         line = self.popuntilstartmatch(lines, "fzf-type: ")
-        raw_fzf_type = line.split()[1]
-        if any(raw_fzf_type.endswith(f"-{x}")
-               for x in ("edge", "safari", "firefox", "chrome")):
-            base, browser = raw_fzf_type.rsplit("-", 1)
-            self.fzf_type = TYPE_MAP[base] + f" - {browser.capitalize()}"
-            self.browser = True
-        else:
-            self.fzf_type = TYPE_MAP[raw_fzf_type]
-            self.browser = False
+        self.fzf_type, self.browser = fzfTypeLabel(line.split()[1])
         line = self.popuntilstartmatch(lines, "lines.txt loaded:")
         _, _, nrlines, _, _, lines_load_time_ms = line.split()
         self.nrlines = int(nrlines)
@@ -215,25 +375,231 @@ class RunData:
             assert line.startswith(f"--- ../{self.nrlines}.txt "), line
             searchtime = int(line.split()[2])
             searchterm = line.split(" ", 4)[-1]
-            if lines[-1].startswith("hash: "):
+            if lines.peek().startswith("hash: "):
                 line = lines.pop()
                 assert line.startswith("hash: ")
                 hash = line.split()[1][:5]
             else:
                 hash = None
-            if lines[-1].startswith("+++ filename "):
+            if lines.peek().startswith("+++ filename "):
                 line = lines.pop()
                 gosearchtime = int(line.split()[2])
             else:
                 gosearchtime = None
 
             self.search_times_ms_nr_results[searchterm] = (searchtime, gosearchtime, hash, nrresults)
+            if lines.peek().startswith("Result sent "):
+                self.recordevent(lines.pop())
         if self.browser:
             self.memory_used_mib = None
         else:
             line = self.popuntilstartmatch(lines, "	Maximum resident set size (kbytes):")
             self.memory_used_mib = float(line.split()[-1]) / 1024
 
+
+SEARCH_TERMS = tuple("hello world"[:i] for i in range(1, len("hello world") + 1))
+
+RUN_DTYPE = np.dtype([
+    ("fzf_type", "U40"),
+    ("browser", "i1"),  # -1 when the run aborted before the fzf-type line
+    ("aborted", "?"),
+    ("nrlines", "f8"),
+    ("lines_load_time_ms", "f8"),
+    ("fzf_init_time_ms", "f8"),
+    ("memory_used_mib", "f8"),
+])
+
+
+class RunTable:
+    """
+    Columnar storage of runs. `runs` is a structured array (RUN_DTYPE) with
+    one row per run; the search results are runs × SEARCH_TERMS arrays.
+    Values that are not known (browser memory use, searches that an aborted
+    run never got to) are NaN, or "" for the hashes.
+    `events` (runs × RUN_EVENTS) and `search_events` (runs × SEARCH_EVENTS ×
+    SEARCH_TERMS) hold the epoch ms timestamps of the logged events.
+    """
+    runs: np.ndarray
+    search_time_ms: np.ndarray
+    go_search_time_ms: np.ndarray
+    nrresults: np.ndarray
+    hashes: np.ndarray
+    events: np.ndarray
+    search_events: np.ndarray
+
+    COLUMNS = ("runs", "search_time_ms", "go_search_time_ms", "nrresults",
+               "hashes", "events", "search_events")
+
+    def __init__(self, runs, search_time_ms, go_search_time_ms, nrresults,
+                 hashes, events, search_events):
+        self.runs = runs
+        self.search_time_ms = search_time_ms
+        self.go_search_time_ms = go_search_time_ms
+        self.nrresults = nrresults
+        self.hashes = hashes
+        self.events = events
+        self.search_events = search_events
+
+    @classmethod
+    def fromParsedRuns(cls, parsedRuns: t.Iterable[ParsedRun]) -> RunTable:
+        rows = []
+        searches = []
+        hashes = []
+        events = []
+        search_events = []
+        for parsedRun in parsedRuns:
+            rows.append((
+                parsedRun.fzf_type or "",
+                -1 if parsedRun.browser is None else parsedRun.browser,
+                parsedRun.aborted,
+                *[np.nan if value is None else value for value in (
+                    parsedRun.nrlines,
+                    parsedRun.lines_load_time_ms,
+                    parsedRun.fzf_init_time_ms,
+                    parsedRun.memory_used_mib,
+                )],
+            ))
+            search = np.full((3, len(SEARCH_TERMS)), np.nan)
+            hashrow = [""] * len(SEARCH_TERMS)
+            for term, (searchtime, gosearchtime, hash, nrresults) in (
+                    parsedRun.search_times_ms_nr_results.items()):
+                index = SEARCH_TERMS.index(term)
+                search[:, index] = (
+                    searchtime,
+                    np.nan if gosearchtime is None else gosearchtime,
+                    nrresults,
+                )
+                hashrow[index] = hash or ""
+            searches.append(search)
+            hashes.append(hashrow)
+            events.append([parsedRun.events.get(name, np.nan)
+                           for name in RUN_EVENTS])
+            runsearchevents = np.full(
+                (len(SEARCH_EVENTS), len(SEARCH_TERMS)), np.nan)
+            for (name, index), epoch_ms in parsedRun.search_events.items():
+                if 0 <= index < len(SEARCH_TERMS):
+                    runsearchevents[SEARCH_EVENTS.index(name), index] = epoch_ms
+            search_events.append(runsearchevents)
+        searches = np.array(searches).reshape((-1, 3, len(SEARCH_TERMS)))
+        return cls(
+            runs=np.array(rows, dtype=RUN_DTYPE),
+            search_time_ms=searches[:, 0],
+            go_search_time_ms=searches[:, 1],
+            nrresults=searches[:, 2],
+            hashes=np.array(hashes, dtype="U5").reshape(
+                (-1, len(SEARCH_TERMS))),
+            events=np.array(events, dtype=float).reshape(
+                (-1, len(RUN_EVENTS))),
+            search_events=np.array(search_events, dtype=float).reshape(
+                (-1, len(SEARCH_EVENTS), len(SEARCH_TERMS))),
+        )
+
+    @classmethod
+    def concatenate(cls, tables: t.Sequence[RunTable]) -> RunTable:
+        return cls(*[np.concatenate([getattr(table, name) for table in tables])
+                     for name in cls.COLUMNS])
+
+    @functools.cached_property
+    def fzf_type_codes(self) -> t.Tuple[np.ndarray, np.ndarray]:
+        """
+        (sorted fzf_types, index into those for every run); of a table made
+        by select(), the fzf_types may include some that none of its runs has
+        """
+        return np.unique(self.runs["fzf_type"], return_inverse=True)
+
+    def select(self, selection: np.ndarray) -> RunTable:
+        """
+        New table with only the rows in `selection` (mask or indices); it
+        shares fzf_type_codes with this table, if those were calculated.
+        """
+        table = RunTable(*[getattr(self, name)[selection]
+                           for name in self.COLUMNS])
+        if "fzf_type_codes" in self.__dict__:
+            fzf_types, fzf_type_index = self.fzf_type_codes
+            table.__dict__["fzf_type_codes"] = (fzf_types,
+                                                fzf_type_index[selection])
+        return table
+
+    def matching(self, fzf_types: t.Optional[t.Iterable[str]] = None,
+                 nrlines: t.Optional[t.Iterable[int]] = None) -> np.ndarray:
+        """Mask of the runs with one of `fzf_types` and `nrlines`"""
+        selection = np.ones(len(self), dtype=bool)
+        if fzf_types is not None:
+            selection &= np.isin(self.runs["fzf_type"], list(fzf_types))
+        if nrlines is not None:
+            selection &= np.isin(self.runs["nrlines"], list(nrlines))
+        return selection
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def __getitem__(self, index: int) -> RunData:
+        if not -len(self) <= index < len(self):
+            raise IndexError("RunTable index out of range")
+        return RunData(self, index % len(self))
+
+    def __iter__(self) -> t.Iterator[RunData]:
+        return (RunData(self, index) for index in range(len(self)))
+
+
+def _intornone(value: float) -> t.Optional[int]:
+    return None if math.isnan(value) else int(value)
+
+
+class RunData:
+    """A view of one row of a RunTable"""
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: RunTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def fzf_type(self) -> t.Optional[str]:
+        return str(self.table.runs["fzf_type"][self.index]) or None
+
+    @property
+    def browser(self) -> t.Optional[bool]:
+        browser = self.table.runs["browser"][self.index]
+        return None if browser < 0 else bool(browser)
+
+    @property
+    def aborted(self) -> bool:
+        return bool(self.table.runs["aborted"][self.index])
+
+    @property
+    def nrlines(self) -> t.Optional[int]:
+        return _intornone(self.table.runs["nrlines"][self.index])
+
+    @property
+    def lines_load_time_ms(self) -> t.Optional[int]:
+        return _intornone(self.table.runs["lines_load_time_ms"][self.index])
+
+    @property
+    def fzf_init_time_ms(self) -> t.Optional[int]:
+        return _intornone(self.table.runs["fzf_init_time_ms"][self.index])
+
+    @property
+    def memory_used_mib(self) -> t.Optional[float]:
+        memory = float(self.table.runs["memory_used_mib"][self.index])
+        return None if math.isnan(memory) else memory
+
+    @property
+    def search_times_ms_nr_results(self) -> t.Mapping[
+            str, t.Tuple[int, t.Optional[int], t.Optional[str], int]]:
+        table = self.table
+        return {
+            term: (int(searchtime), _intornone(gosearchtime), hash or None,
+                   int(nrresults))
+            for term, searchtime, gosearchtime, hash, nrresults in zip(
+                SEARCH_TERMS,
+                table.search_time_ms[self.index].tolist(),
+                table.go_search_time_ms[self.index].tolist(),
+                table.hashes[self.index].tolist(),
+                table.nrresults[self.index].tolist())
+            if not math.isnan(searchtime)
+        }
+
     def __repr__(self):
         aborted = "<aborted>" if self.aborted else ""
         memused = self.memory_used_mib and round(self.memory_used_mib, 1)
@@ -246,60 +612,1042 @@ class RunData:
         )
 
 
-def loadRunData() -> t.Sequence[RunData]:
-    runDatas: t.MutableSequence[RunData] = []
-    for filename in (
-        pathlib.Path(__file__).parent / "results-native-2.txt",
-        pathlib.Path(__file__).parent / "results-native-nogc-2.txt",
-        pathlib.Path(__file__).parent / "results.browsers.txt",
-        pathlib.Path(__file__).parent / "results-new.txt",
-        pathlib.Path(__file__).parent / "results-debugnogc.txt",
-                     ):
-        data = pathlib.Path(filename).read_text()
-        lines = list(reversed(data.splitlines()))
-        while True:
+CACHE_DIR = pathlib.Path(__file__).parent / ".cache"
+CACHE_VERSION = 3
+
+RESULTS_FILENAMES = (
+    pathlib.Path(__file__).parent / "results-native-2.txt",
+    pathlib.Path(__file__).parent / "results-native-nogc-2.txt",
+    pathlib.Path(__file__).parent / "results.browsers.txt",
+    pathlib.Path(__file__).parent / "results-new.txt",
+    pathlib.Path(__file__).parent / "results-debugnogc.txt",
+)
+
+
+# results files may be stored compressed, recognised by their suffix
+COMPRESSED_OPENERS: t.Mapping[str, t.Callable[..., t.IO]] = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+
+
+def openResults(filename: pathlib.Path, mode: str = "rt") -> t.IO:
+    """Opens a (possibly compressed) results file; it is read streaming"""
+    opener = COMPRESSED_OPENERS.get(filename.suffix, open)
+    return opener(filename, mode)
+
+
+def findResults(filename: pathlib.Path) -> pathlib.Path:
+    """
+    `filename`, or a compressed version of it if only that exists (so the
+    logs in RESULTS_FILENAMES can be recompressed without changing it).
+    """
+    if filename.exists():
+        return filename
+    for suffix in COMPRESSED_OPENERS:
+        compressed = filename.with_name(filename.name + suffix)
+        if compressed.exists():
+            return compressed
+    return filename
+
+
+def recompressResults(filename: pathlib.Path, suffix: str = ".xz",
+                      remove: bool = False) -> pathlib.Path:
+    """
+    Writes a copy of a (possibly already compressed) results file with
+    the compression of `suffix`, streaming, and returns its name.
+    """
+    if filename.suffix in COMPRESSED_OPENERS:
+        target = filename.with_suffix(suffix)
+    else:
+        target = filename.with_name(filename.name + suffix)
+    if target == filename:
+        return filename
+    tmpfile = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with openResults(filename, "rb") as source, \
+            COMPRESSED_OPENERS[suffix](tmpfile, "wb") as destination:
+        shutil.copyfileobj(source, destination, 1 << 20)
+    tmpfile.replace(target)
+    if remove:
+        filename.unlink()
+    return target
+
+
+def iterParsedRuns(filename: pathlib.Path) -> t.Iterator[ParsedRun]:
+    """
+    Yields the runs in a results file one at a time, reading the file
+    (decompressing it if needed) incrementally. Aborted runs are yielded with
+    `aborted` set.
+    """
+    with openResults(filename) as f:
+        yield from _iterParsedRuns(f)
+
+
+def _iterParsedRuns(f: t.Iterable[str]) -> t.Iterator[ParsedRun]:
+    lines = LogLines(f)
+    while True:
+        try:
+            yield ParsedRun(lines)
+        except RunDataNoMatchException as e:
+            yield e.runData
+        except RunDataOutOfLinesException:
+            return
+
+
+def parseRunTable(filename: pathlib.Path) -> RunTable:
+    return RunTable.fromParsedRuns(iterParsedRuns(filename))
+
+
+def fileDigest(filename: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_NRLINES_RE = re.compile(rb"(\d+)\.txt")
+
+
+class RunIndex:
+    """
+    Where every run in a results file starts (byte offset in the, possibly
+    decompressed, file), with its fzf_type and haystack size, as found by
+    scanning only the `******` and `fzf-type:` lines. The n runs are in the
+    same order as iterParsedRuns yields them; `offsets` has n + 1 entries,
+    the last one being the end of the file.
+    """
+    COLUMNS = ("offsets", "fzf_type", "nrlines")
+
+    def __init__(self, offsets: np.ndarray, fzf_type: np.ndarray,
+                 nrlines: np.ndarray):
+        self.offsets = offsets
+        self.fzf_type = fzf_type
+        self.nrlines = nrlines
+
+    @classmethod
+    def scan(cls, filename: pathlib.Path) -> RunIndex:
+        offsets = []
+        fzf_types = []
+        nrlines = []
+        offset = 0
+        with openResults(filename, "rb") as f:
+            for line in f:
+                if line.startswith(b"******"):
+                    offsets.append(offset)
+                    fzf_types.append("")
+                    match = _NRLINES_RE.search(line)
+                    nrlines.append(int(match[1]) if match else -1)
+                elif (line.startswith(b"fzf-type: ") and fzf_types
+                        and not fzf_types[-1]):
+                    fzf_types[-1] = fzfTypeLabel(line.split()[1].decode())[0]
+                offset += len(line)
+        return cls(np.array(offsets + [offset], dtype=np.int64),
+                   np.array(fzf_types, dtype="U40"),
+                   np.array(nrlines, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.fzf_type)
+
+    def select(self, fzf_types: t.Optional[t.Iterable[str]] = None,
+               nrlines: t.Optional[t.Iterable[int]] = None) -> np.ndarray:
+        """Mask of the runs with one of `fzf_types` and `nrlines`"""
+        selection = np.ones(len(self), dtype=bool)
+        if fzf_types is not None:
+            selection &= np.isin(self.fzf_type, list(fzf_types))
+        if nrlines is not None:
+            selection &= np.isin(self.nrlines, list(nrlines))
+        return selection
+
+    def ranges(self, selection: np.ndarray) -> t.Sequence[t.Tuple[int, int]]:
+        """(start, end) byte ranges that hold the selected runs"""
+        edges = np.diff(np.concatenate([[0], selection.view(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return list(zip(self.offsets[starts].tolist(),
+                        self.offsets[ends].tolist()))
+
+
+def loadRunIndex(filename: pathlib.Path) -> RunIndex:
+    """
+    The RunIndex of a results file, from its sidecar in CACHE_DIR if the
+    size and modification time of the file did not change.
+    """
+    stat = filename.stat()
+    key = np.array([str(CACHE_VERSION), str(stat.st_size),
+                    str(stat.st_mtime_ns)])
+    indexfile = CACHE_DIR / f"{filename.name}.index.npz"
+    try:
+        with np.load(indexfile, allow_pickle=False) as cached:
+            if np.array_equal(cached["key"], key):
+                return RunIndex(*[cached[name] for name in RunIndex.COLUMNS])
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        pass
+
+    index = RunIndex.scan(filename)
+    _writeCache(indexfile, key=key,
+                **{name: getattr(index, name) for name in RunIndex.COLUMNS})
+    return index
+
+
+# the runs in a results file are parsed in chunks of about this size, on
+# PARSE_WORKERS processes; by default one per core, but main.py --jobs shares
+# the cores between its workers through the environment
+PARSE_CHUNK_BYTES = 1 << 20
+PARSE_WORKERS = int(os.environ.get("ASSETFACTORY_PARSE_WORKERS", 0)) or (
+    os.cpu_count() or 1)
+
+
+def _forkMap(function: t.Callable[[t.Any], t.Any], items: t.Sequence[t.Any],
+             workers: int) -> t.List[t.Any]:
+    """
+    [function(item) for item in items], on up to `workers` forked processes.
+    The plot scripts load this module from its file, so its functions cannot
+    be pickled by name for a regular process pool; forked processes inherit
+    them instead, and only the items' results (which must be picklable
+    without this module) are sent back.
+    """
+    workers = min(workers, len(items))
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [function(item) for item in items]
+    context = multiprocessing.get_context("fork")
+    resultqueue = context.Queue()
+
+    def work(first: int) -> None:
+        for index in range(first, len(items), workers):
             try:
-                runData = RunData(lines)
-                runDatas.append(runData)
-            except RunDataNoMatchException as e:
-                runDatas.append(e.runData)
-            except RunDataOutOfLinesException:
-                break
-    hashes = {}
-    for runData in runDatas:
-        if runData.aborted:
-            continue
-        key = runData.nrlines
-        myhashes = tuple([i[2] for i in runData.search_times_ms_nr_results.values()])
-        if key in hashes:
-            if hashes[key][0] != myhashes:
-                print(f"For {key}:\n    {hashes[key][0]} ({hashes[key][1]}) !=\n    {myhashes} {runData.fzf_type}")
-                breakpoint()
+                resultqueue.put((index, function(items[index]), None))
+            except Exception:
+                resultqueue.put((index, None, traceback.format_exc()))
+
+    processes = [context.Process(target=work, args=(first, ), daemon=True)
+                 for first in range(workers)]
+    for process in processes:
+        process.start()
+    results: t.List[t.Any] = [None] * len(items)
+    errors = []
+    try:
+        received = 0
+        while received < len(items):
+            try:
+                index, result, error = resultqueue.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("A parse worker died") from None
+                continue
+            received += 1
+            results[index] = result
+            if error is not None:
+                errors.append(error)
+    finally:
+        for process in processes:
+            process.join()
+    if errors:
+        raise RuntimeError("Parsing failed in a worker:\n" + errors[0])
+    return results
+
+
+def _splitRanges(offsets: np.ndarray, ranges: t.Iterable[t.Tuple[int, int]],
+                 chunkbytes: int) -> t.List[t.Tuple[int, int]]:
+    """
+    The byte ranges (see RunIndex.ranges) split at run boundaries (offsets)
+    into chunks of about `chunkbytes`; a longer run is a chunk by itself.
+    """
+    chunks = []
+    for start, end in ranges:
+        boundaries = offsets[np.searchsorted(offsets, start):
+                             np.searchsorted(offsets, end, side="right")]
+        bucket = (boundaries - start) // chunkbytes
+        cuts = boundaries[1:-1][np.diff(bucket)[:-1] > 0]
+        edges = [start, *cuts.tolist(), end]
+        chunks.extend((first, last) for first, last in zip(edges[:-1], edges[1:])
+                      if first < last)
+    return chunks
+
+
+def _parseChunks(item: t.Tuple[pathlib.Path, t.Sequence[t.Tuple[int, int]]]
+                 ) -> t.List[t.Sequence[np.ndarray]]:
+    """
+    Parses the chunks (byte ranges, in file order) of one file, reading them
+    one at a time through a single open file; for a compressed file, that is
+    a single pass of decompression up to the last chunk.
+    """
+    filename, ranges = item
+    results = []
+    with openResults(filename, "rb") as f:
+        for start, end in ranges:
+            f.seek(start)
+            data = f.read(end - start)
+            table = RunTable.fromParsedRuns(
+                _iterParsedRuns(io.TextIOWrapper(io.BytesIO(data))))
+            # plain arrays, see _forkMap
+            results.append([getattr(table, name) for name in RunTable.COLUMNS])
+    return results
+
+
+def parseFileRanges(
+        files: t.Sequence[t.Tuple[pathlib.Path, t.Iterable[t.Tuple[int, int]]]],
+        workers: t.Optional[int] = None,
+        ) -> t.List[RunTable]:
+    """
+    Parses the runs in the byte ranges (see RunIndex.ranges) of every
+    (filename, ranges), all files together split into chunks at run
+    boundaries that are parsed on `workers` (default PARSE_WORKERS) processes.
+    Every worker reads its own chunks, so no more than a chunk per worker is
+    in memory. A compressed file cannot be read from the middle, so its
+    chunks are split into a consecutive run of chunks per worker, which each
+    decompresses the file up to its last one.
+    Returns a table per file, with its runs in file order.
+    """
+    workers = PARSE_WORKERS if workers is None else workers
+    items = []
+    owners = []
+    for fileindex, (filename, ranges) in enumerate(files):
+        index = loadRunIndex(filename)
+        ranges = _splitRanges(index.offsets, ranges, PARSE_CHUNK_BYTES)
+        if filename.suffix in COMPRESSED_OPENERS:
+            groups = min(workers, len(ranges))
+            items.extend(
+                (filename, ranges[group * len(ranges) // groups:
+                                  (group + 1) * len(ranges) // groups])
+                for group in range(groups))
+            owners.extend([fileindex] * groups)
         else:
-            hashes[key] = (myhashes, runData.fzf_type)
+            items.extend((filename, [chunk]) for chunk in ranges)
+            owners.extend([fileindex] * len(ranges))
+    results = _forkMap(_parseChunks, items, workers)
+    tables = [[] for _ in files]
+    for fileindex, chunks in zip(owners, results):
+        tables[fileindex].extend(RunTable(*columns) for columns in chunks)
+    return [RunTable.concatenate(filetables) if filetables
+            else RunTable.fromParsedRuns([]) for filetables in tables]
+
+
+def parseRunRanges(filename: pathlib.Path,
+                   ranges: t.Iterable[t.Tuple[int, int]]) -> RunTable:
+    """Parses only the runs in the given byte ranges (see RunIndex.ranges)"""
+    return parseFileRanges([(filename, ranges)])[0]
+
+
+def loadRunTableFile(
+        filename: pathlib.Path,
+        fzf_types: t.Optional[t.Iterable[str]] = None,
+        nrlines: t.Optional[t.Iterable[int]] = None,
+        ) -> RunTable:
+    """
+    Parses a results file, using the cached parse result in CACHE_DIR if the
+    size, modification time and content hash of the file did not change.
+    Within one process the table is only loaded once (see dataset.py).
+    With `fzf_types` and/or `nrlines`, only the matching runs are returned;
+    if the file has no valid cached parse result, only those runs are read
+    and parsed (see RunIndex).
+    """
+    return loadRunTableFiles([filename], fzf_types, nrlines)[0]
+
+
+def loadRunTableFiles(
+        filenames: t.Sequence[pathlib.Path],
+        fzf_types: t.Optional[t.Iterable[str]] = None,
+        nrlines: t.Optional[t.Iterable[int]] = None,
+        ) -> t.List[RunTable]:
+    """
+    loadRunTableFile() for every file; the files (or the runs of them) that
+    need parsing are parsed together (see parseFileRanges).
+    """
+    filtered = fzf_types is not None or nrlines is not None
+    tables: t.List[t.Optional[RunTable]] = [None] * len(filenames)
+    keys: t.List[t.Optional[np.ndarray]] = [None] * len(filenames)
+    selections: t.List[t.Optional[np.ndarray]] = [None] * len(filenames)
+    for position, filename in enumerate(filenames):
+        if filtered:
+            index = loadRunIndex(filename)
+            selections[position] = index.select(fzf_types, nrlines)
+            if (table := cachedRunTableFile(filename)) is not None:
+                assert len(table) == len(index), (
+                    filename, len(table), len(index))
+                tables[position] = table.select(selections[position])
+        elif (table := _loadedRunTableFile(filename)) is not None:
+            tables[position] = table
+        else:
+            keys[position] = _runTableCacheKey(filename)
+            tables[position] = _readRunTableCache(filename, keys[position])
+
+    missing = [position for position, table in enumerate(tables)
+               if table is None]
+    files = []
+    for position in missing:
+        index = loadRunIndex(filenames[position])
+        selection = selections[position] if filtered else index.select()
+        files.append((filenames[position], index.ranges(selection)))
+    for position, table in zip(missing, parseFileRanges(files)):
+        tables[position] = table
+        if not filtered:
+            _writeCache(CACHE_DIR / f"{filenames[position].name}.npz",
+                        key=keys[position],
+                        **{name: getattr(table, name)
+                           for name in RunTable.COLUMNS})
+
+    if not filtered and dataset is not None:
+        for position, filename in enumerate(filenames):
+            stat = filename.stat()
+            tables[position] = dataset.cached(
+                f"runtable:{filename.resolve()}",
+                (stat.st_size, stat.st_mtime_ns),
+                lambda: tables[position],
+                inputs=[filename])
+    return tables
+
+
+def _loadedRunTableFile(filename: pathlib.Path) -> t.Optional[RunTable]:
+    """The parsed table if it is loaded in this process already, else None"""
+    if dataset is None:
+        return None
+    stat = filename.stat()
+    return dataset.get(f"runtable:{filename.resolve()}",
+                       (stat.st_size, stat.st_mtime_ns))
+
+
+def _runTableCacheKey(filename: pathlib.Path) -> np.ndarray:
+    stat = filename.stat()
+    return np.array([str(CACHE_VERSION), str(stat.st_size),
+                     str(stat.st_mtime_ns), fileDigest(filename)])
+
+
+def cachedRunTableFile(filename: pathlib.Path) -> t.Optional[RunTable]:
+    """The parsed table if it is loaded or cached already, else None"""
+    if (table := _loadedRunTableFile(filename)) is not None:
+        return table
+    table = _readRunTableCache(filename, _runTableCacheKey(filename))
+    if table is not None and dataset is not None:
+        stat = filename.stat()
+        dataset.cached(f"runtable:{filename.resolve()}",
+                       (stat.st_size, stat.st_mtime_ns), lambda: table)
+    return table
+
+
+def _readRunTableCache(filename: pathlib.Path,
+                       key: np.ndarray) -> t.Optional[RunTable]:
+    cachefile = CACHE_DIR / f"{filename.name}.npz"
+    try:
+        with np.load(cachefile, allow_pickle=False) as cached:
+            if np.array_equal(cached["key"], key):
+                return RunTable(*[cached[name] for name in RunTable.COLUMNS])
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        pass
+    return None
+
+
+def _writeCache(cachefile: pathlib.Path, **arrays: np.ndarray) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    tmpfile = cachefile.with_suffix(f".{os.getpid()}.tmp")
+    tmpfile.write_bytes(buffer.getvalue())
+    tmpfile.replace(cachefile)
 
 
-    return t.cast(t.Sequence[RunData], runDatas)
+class BadRun(t.NamedTuple):
+    """A search of a run with another number of results or hash than expected"""
+    index: int  # row in the RunTable
+    fzf_type: str
+    nrlines: int
+    term: str
+    field: str  # "nrresults" or "hash"
+    actual: str
+    expected: str
+    # what the expectation came from: the fzf_type of another run, or
+    # "reference"
+    source: str
 
-def markdown_table(data, large_small_multiplier) -> str:
-    totaldata = {
-        key: {
-            nr: np.sum(data[key][nr]) for nr in data[key]
-        } for key in data
-    }
+    def __str__(self) -> str:
+        return (f"{self.fzf_type} on {self.nrlines} lines, '{self.term}': "
+                f"{self.field} {self.actual} != {self.expected} "
+                f"({self.source})")
+
+
+def checkHashes(table: RunTable) -> t.Sequence[BadRun]:
+    """
+    The searches whose hash differs from that of the first (not aborted) run
+    on the same number of lines; these are printed as well.
+    """
+    badruns = []
+    first: t.Dict[int, int] = {}
+    for index in np.flatnonzero(~table.runs["aborted"]):
+        key = int(table.runs["nrlines"][index])
+        other = first.setdefault(key, index)
+        for termindex in np.flatnonzero(table.hashes[index] != table.hashes[other]):
+            badruns.append(BadRun(
+                int(index), str(table.runs["fzf_type"][index]), key,
+                SEARCH_TERMS[termindex], "hash",
+                str(table.hashes[index, termindex]),
+                str(table.hashes[other, termindex]),
+                str(table.runs["fzf_type"][other])))
+    for badrun in badruns:
+        print(badrun)
+    return badruns
+
+
+def validateRuns(table: RunTable,
+                 expected: t.Mapping[int, t.Tuple[np.ndarray, np.ndarray]]
+                 ) -> t.Sequence[BadRun]:
+    """
+    The searches of runs whose number of results or hash differs from
+    `expected`, which maps nrlines to the SEARCH_TERMS arrays of nrresults
+    and hashes that a reference matcher found (see reference.py). Searches
+    that a run did not get to, or did not log a hash for, are not checked.
+    """
+    badruns = []
+    for nrlines, (nrresults, hashes) in expected.items():
+        rows = np.flatnonzero(table.runs["nrlines"] == nrlines)
+        runnrresults = table.nrresults[rows]
+        runhashes = table.hashes[rows]
+        hashes = np.asarray(hashes, dtype="U5")
+        checks = [
+            ("nrresults", ~np.isnan(runnrresults) & (runnrresults != nrresults),
+             lambda row, term: f"{runnrresults[row, term]:.0f}",
+             lambda term: f"{nrresults[term]}"),
+            ("hash", (runhashes != "") & (runhashes != hashes),
+             lambda row, term: str(runhashes[row, term]),
+             lambda term: str(hashes[term])),
+        ]
+        for field, wrong, actual, expectation in checks:
+            for row, term in zip(*np.nonzero(wrong)):
+                index = int(rows[row])
+                badruns.append(BadRun(
+                    index, str(table.runs["fzf_type"][index]), nrlines,
+                    SEARCH_TERMS[term], field, actual(row, term),
+                    expectation(term), "reference"))
+    return sorted(badruns)
+
+
+class Catalog:
+    """
+    A set of results files: RESULTS_FILENAMES by default, or the files that
+    match a glob or are listed in a manifest (a JSON list of filenames,
+    relative to the manifest).
+    """
+    def __init__(self, filenames: t.Iterable[pathlib.Path]):
+        self.filenames = [findResults(pathlib.Path(filename))
+                          for filename in filenames]
+
+    @classmethod
+    def fromGlob(cls, pattern: str,
+                 directory: pathlib.Path = pathlib.Path(__file__).parent
+                 ) -> Catalog:
+        return cls(sorted(directory.glob(pattern)))
+
+    @classmethod
+    def fromManifest(cls, manifest: pathlib.Path) -> Catalog:
+        return cls([manifest.parent / filename
+                    for filename in json.loads(manifest.read_text())])
+
+    def index(self) -> t.Mapping[pathlib.Path, RunIndex]:
+        return {filename: loadRunIndex(filename) for filename in self.filenames}
+
+    def load(self, fzf_types: t.Optional[t.Iterable[str]] = None,
+             nrlines: t.Optional[t.Iterable[int]] = None) -> RunTable:
+        table = RunTable.concatenate(
+            loadRunTableFiles(self.filenames, fzf_types, nrlines))
+        checkHashes(table)
+        return table
+
+
+def prepare() -> None:
+    """
+    Loads (and checks) all runs once (see main.py --all), so that the plots
+    select their runs from that table instead of parsing them.
+    """
+    loadRunTable()
+
+
+def loadRunTable(
+        fzf_types: t.Optional[t.Iterable[str]] = None,
+        nrlines: t.Optional[t.Iterable[int]] = None,
+        catalog: t.Optional[Catalog] = None,
+        ) -> RunTable:
+    """
+    All runs in the catalog (RESULTS_FILENAMES, or their compressed versions,
+    by default), or only those with one of `fzf_types` and `nrlines`. When
+    running through main.py, the table of all runs is loaded and checked once
+    per process and shared by all plot scripts (see dataset.py); if it is
+    loaded (see prepare), the runs of a selection are taken from it, with its
+    grouping of fzf_types. Otherwise only the runs of the selection are read
+    (see RunIndex), and checked by themselves.
+    """
+    if catalog is None:
+        catalog = Catalog(RESULTS_FILENAMES)
+    if fzf_types is not None:
+        fzf_types = sorted(fzf_types)
+    if nrlines is not None:
+        nrlines = sorted(int(nr) for nr in nrlines)
+    if dataset is None:
+        return catalog.load(fzf_types, nrlines)
+    filenames = catalog.filenames
+    stats = [filename.stat() for filename in filenames]
+    key = "runtable:" + ":".join(str(f.resolve()) for f in filenames)
+    stamp = tuple((stat.st_size, stat.st_mtime_ns) for stat in stats)
+    if fzf_types is None and nrlines is None:
+        return dataset.cached(key, stamp, catalog.load, inputs=filenames)
+
+    def load() -> RunTable:
+        full = dataset.get(key, stamp)
+        if full is None:
+            return catalog.load(fzf_types, nrlines)
+        # calculated once, so that every selection shares it
+        full.fzf_type_codes
+        return full.select(full.matching(fzf_types, nrlines))
+    return dataset.cached(f"{key}:{fzf_types}:{nrlines}", stamp, load,
+                          inputs=filenames)
+
+
+def loadRunData() -> t.Sequence[RunData]:
+    return list(loadRunTable())
+
+class RunStats:
+    """
+    Statistics of a runs × values array, grouped by (fzf_type, nrlines).
+    Every statistic is a keys × nrlines × values array, groups without any
+    runs are NaN (and have count 0). `total_ci`, if bootstrapped, is a
+    keys × nrlines × 2 array with the (low, high) confidence interval of the
+    mean total.
+    """
+    def __init__(self, keys: t.Sequence[str], nrlines: np.ndarray,
+                 count: np.ndarray, mean: np.ndarray, std: np.ndarray,
+                 min: np.ndarray, max: np.ndarray,
+                 percentiles: t.Mapping[float, np.ndarray],
+                 total_ci: t.Optional[np.ndarray] = None):
+        self.keys = list(keys)
+        self.nrlines = nrlines
+        self.count = count
+        self.mean = mean
+        self.std = std
+        self.min = min
+        self.max = max
+        self.percentiles = percentiles
+        self.total_ci = total_ci
+
+    @property
+    def median(self) -> np.ndarray:
+        return self.percentiles[50]
+
+    def total(self, statistic: str = "mean") -> np.ndarray:
+        """keys × nrlines sum over the values of a statistic"""
+        return getattr(self, statistic).sum(axis=2)
+
+
+BOOTSTRAP_RESAMPLES = 2000
+
+
+def runGroups(table: RunTable, keys: t.Sequence[str],
+              nrlines: t.Sequence[int]) -> np.ndarray:
+    """
+    For every run the index of its (fzf_type, nrlines) group in a keys ×
+    nrlines grid (flattened), or -1 for runs of other types or sizes.
+    """
+    keys = list(keys)
+    nrlines = np.asarray(nrlines)
+    fzf_types, fzf_type_index = table.fzf_type_codes
+    keyindex = np.array([keys.index(k) if k in keys else -1
+                         for k in fzf_types.tolist()], dtype=int
+                        )[fzf_type_index]
+    sorter = np.argsort(nrlines)
+    nrindex = np.searchsorted(nrlines, table.runs["nrlines"], sorter=sorter)
+    nrindex = sorter[np.minimum(nrindex, len(nrlines) - 1)]
+    valid = (keyindex >= 0) & (nrlines[nrindex] == table.runs["nrlines"])
+    return np.where(valid, keyindex * len(nrlines) + nrindex, -1)
+
+
+def aggregateRuns(
+        table: RunTable,
+        values: np.ndarray,
+        keys: t.Sequence[str],
+        nrlines: t.Sequence[int],
+        percentiles: t.Iterable[float] = (50,),
+        where: t.Optional[np.ndarray] = None,
+        bootstrap: int = 0,
+        confidence: float = 0.95,
+        seed: int = 0,
+        ) -> RunStats:
+    """
+    Groups the rows of `values` (one per run in `table`) by fzf_type and
+    nrlines, and calculates all statistics for all groups at once: the runs
+    are sorted by group, after which every statistic is a single reduceat
+    (or, for percentiles, an index into the sorted values).
+    Runs of types or sizes not in `keys`/`nrlines`, or not in `where`, are
+    ignored.
+    With `bootstrap` > 0, the `confidence` interval of the mean total of
+    every group is estimated from that many resamples (see bootstrapMeans);
+    it is NaN for groups of a single run, which say nothing about it.
+    """
+    keys = list(keys)
+    nrlines = np.asarray(nrlines)
+    values = np.asarray(values, dtype=float)
+    shape = (len(keys), len(nrlines), values.shape[1])
+
+    group = runGroups(table, keys, nrlines)
+    valid = group >= 0
+    if where is not None:
+        valid &= where
+    group = group[valid]
+    values = values[valid]
+
+    # sort by group, and within every group every column by value
+    order = np.lexsort(
+        (values, np.broadcast_to(group[:, np.newaxis], values.shape)), axis=0)
+    sortedvalues = np.take_along_axis(values, order, axis=0)
+    groups, starts, counts = np.unique(
+        group[order[:, 0]] if len(group) else group,
+        return_index=True, return_counts=True)
+
+    def scatter(groupstats: np.ndarray) -> np.ndarray:
+        result = np.full((shape[0] * shape[1], groupstats.shape[1]), np.nan)
+        result[groups] = groupstats
+        return result.reshape((*shape[:2], -1))
+
+    count = np.zeros(shape[0] * shape[1], dtype=int)
+    count[groups] = counts
+    if not len(groups):
+        empty = np.full(shape, np.nan)
+        return RunStats(keys, nrlines, count.reshape(shape[:2]), empty, empty,
+                        empty, empty, {q: empty for q in percentiles},
+                        np.full((*shape[:2], 2), np.nan) if bootstrap else None)
+
+    sums = np.add.reduceat(sortedvalues, starts, axis=0)
+    means = sums / counts[:, np.newaxis]
+    deviations = sortedvalues - np.repeat(means, counts, axis=0)
+    variances = np.add.reduceat(deviations ** 2, starts, axis=0) / counts[:, np.newaxis]
+    # NaNs sort last, so a group's last value is NaN if it has any
+    hasnan = np.isnan(sortedvalues[starts + counts - 1])
+
+    def percentile(q: float) -> np.ndarray:
+        position = starts[:, np.newaxis] + q / 100 * (counts[:, np.newaxis] - 1)
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        fraction = position - low
+        columns = np.arange(values.shape[1])
+        result = (sortedvalues[low, columns] * (1 - fraction)
+                  + sortedvalues[high, columns] * fraction)
+        result[hasnan] = np.nan
+        return result
+
+    minimum = sortedvalues[starts]
+    maximum = sortedvalues[starts + counts - 1]
+    minimum[hasnan] = np.nan
+    total_ci = None
+    if bootstrap:
+        # order[:, 0] has the runs sorted by group, with all their values
+        totals = values[order[:, 0]].sum(axis=1)
+        low, high = bootstrapMeans(
+            totals, starts, counts, bootstrap,
+            ((1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100), seed)
+        low[counts < 2] = np.nan
+        high[counts < 2] = np.nan
+        total_ci = scatter(np.column_stack([low, high]))
+    return RunStats(
+        keys, nrlines,
+        count=count.reshape(shape[:2]),
+        mean=scatter(means),
+        std=scatter(np.sqrt(variances)),
+        min=scatter(minimum),
+        max=scatter(maximum),
+        percentiles={q: scatter(percentile(q)) for q in percentiles},
+        total_ci=total_ci,
+    )
+
+
+def bootstrapMeans(
+        sortedvalues: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray,
+        resamples: int,
+        percentiles: t.Sequence[float],
+        seed: int = 0,
+        ) -> np.ndarray:
+    """
+    Percentile bootstrap of the mean of every group in `sortedvalues` (a 1D
+    array sorted by group, with groups as returned by np.unique). All groups
+    are resampled at once: every resample draws, for every position, a random
+    run from the group that position belongs to, so that one reduceat gives
+    the resampled means of all groups. Returns a percentiles × groups array.
+    """
+    rng = np.random.default_rng(seed)
+    positionstarts = np.repeat(starts, counts)
+    positioncounts = np.repeat(counts, counts)
+    picks = positionstarts + rng.integers(
+        0, positioncounts, size=(resamples, len(sortedvalues)))
+    means = np.add.reduceat(sortedvalues[picks], starts, axis=1) / counts
+    return np.percentile(means, percentiles, axis=0)
+
+
+# per method (see findOutliers) the default threshold
+OUTLIER_THRESHOLDS = {"mad": 3.5, "iqr": 1.5, "trim": 0.1}
+# groups of fewer runs than this are left alone: with so few runs, the median
+# and spread say too little to call any of them an outlier
+OUTLIER_MIN_RUNS = 5
+# the spread (MAD / 0.6745, IQR) of a group is taken to be at least the
+# resolution of the timestamps in the results logs, and at least this fraction
+# of the group's median, so that runs that differ by a timer tick or a
+# fraction of a percent from identical neighbours are not outliers
+TIMER_RESOLUTION_MS = 1
+OUTLIER_MIN_SPREAD = 0.01
+
+
+class DroppedRun(t.NamedTuple):
+    """A run that findOutliers() drops from its (fzf_type, nrlines) group"""
+    index: int  # row in the RunTable
+    fzf_type: str
+    nrlines: int
+    total: float
+    median: float  # of the group
+    reason: str
+
+    def __str__(self) -> str:
+        return (f"{self.fzf_type} on {self.nrlines} lines, run {self.index}: "
+                f"{self.total:.4g} (median {self.median:.4g}), {self.reason}")
+
+
+def findOutliers(
+        table: RunTable,
+        values: np.ndarray,
+        keys: t.Sequence[str],
+        nrlines: t.Sequence[int],
+        method: str = "mad",
+        threshold: t.Optional[float] = None,
+        where: t.Optional[np.ndarray] = None,
+        ) -> t.Tuple[np.ndarray, t.List[DroppedRun]]:
+    """
+    The runs whose total of `values` is an outlier within its (fzf_type,
+    nrlines) group, as a mask over the runs and as DroppedRuns:
+    - "mad": a modified z-score 0.6745 · |total - median| / MAD above
+      `threshold` (3.5); when the MAD is 0, 1.2533 · the mean absolute
+      deviation is used instead of MAD / 0.6745.
+    - "iqr": outside the fences Q1 - k · IQR and Q3 + k · IQR, k = `threshold`
+      (1.5).
+    - "trim": the `threshold` fraction (0.1) of the lowest and of the highest
+      runs of every group, so that the mean of the rest is a trimmed mean.
+    Groups with fewer than OUTLIER_MIN_RUNS runs keep all of them, and the
+    spread of the mad and iqr methods has a floor (see TIMER_RESOLUTION_MS).
+    Runs not in `where`, or with a NaN total, are never dropped and do not
+    count for the statistics.
+    """
+    if threshold is None:
+        threshold = OUTLIER_THRESHOLDS[method]
+    nrlines = np.asarray(nrlines)
+    totals = np.asarray(values, dtype=float).sum(axis=1)
+    valid = ~np.isnan(totals)
+    if where is not None:
+        valid &= where
+    group = runGroups(table, keys, nrlines)
+    valid &= group >= 0
+    safegroup = np.maximum(group, 0)
+
+    def perrun(stats: np.ndarray) -> np.ndarray:
+        """keys × nrlines × 1 statistic, for every run of its group"""
+        return stats.reshape(-1)[safegroup]
+
+    stats = aggregateRuns(table, totals[:, np.newaxis], keys, nrlines,
+                          percentiles=(25, 50, 75), where=valid)
+    median = perrun(stats.median)
+    valid &= perrun(stats.count) >= OUTLIER_MIN_RUNS
+    minspread = np.maximum(TIMER_RESOLUTION_MS,
+                           OUTLIER_MIN_SPREAD * np.abs(median))
+    if method == "mad":
+        deviation = np.abs(totals - median)
+        spread = aggregateRuns(table, deviation[:, np.newaxis], keys, nrlines,
+                               percentiles=(50, ), where=valid)
+        mad = perrun(spread.median)
+        scale = np.maximum(np.where(mad > 0, mad / 0.6745,
+                                    perrun(spread.mean) * 1.2533), minspread)
+        score = deviation / scale
+        outlier = valid & (score > threshold)
+        reasons = [f"modified z-score {value:.2f} > {threshold:g}"
+                   for value in score[outlier].tolist()]
+    elif method == "iqr":
+        q1, q3 = perrun(stats.percentiles[25]), perrun(stats.percentiles[75])
+        iqr = np.maximum(q3 - q1, minspread)
+        low = q1 - threshold * iqr
+        high = q3 + threshold * iqr
+        outlier = valid & ((totals < low) | (totals > high))
+        reasons = [f"below Q1 - {threshold:g} IQR ({fence:.4g})" if value < fence
+                   else f"above Q3 + {threshold:g} IQR ({upper:.4g})"
+                   for value, fence, upper in zip(totals[outlier].tolist(),
+                                                  low[outlier].tolist(),
+                                                  high[outlier].tolist())]
+    elif method == "trim":
+        # the rank of every run within its group
+        order = np.lexsort((totals, np.where(valid, group, -1)))
+        sortedgroup = np.where(valid, group, -1)[order]
+        starts = np.searchsorted(sortedgroup, sortedgroup)
+        rank = np.empty(len(totals), dtype=int)
+        rank[order] = np.arange(len(totals)) - starts
+        count = perrun(stats.count)
+        trim = np.floor(threshold * count)
+        outlier = valid & ((rank < trim) | (rank >= count - trim))
+        reasons = [f"{'lowest' if value < middle else 'highest'} "
+                   f"{threshold:.0%} trimmed"
+                   for value, middle in zip(totals[outlier].tolist(),
+                                            median[outlier].tolist())]
+    else:
+        raise ValueError(f"Unknown outlier method {method!r}")
+
+    dropped = [
+        DroppedRun(index, str(table.runs["fzf_type"][index]),
+                   int(table.runs["nrlines"][index]), float(totals[index]),
+                   float(median[index]), reason)
+        for index, reason in zip(np.flatnonzero(outlier).tolist(), reasons)]
+    return outlier, dropped
+
+
+# a fzf_type drifts in a session if the rank correlation of its runs'
+# deviation from their group median with their start time is at least this
+# strong, over at least DRIFT_MIN_RUNS runs, and the deviation changes by at
+# least DRIFT_MIN_CHANGE; a gap of SESSION_GAP_MS between two runs starts a
+# new session
+DRIFT_RHO = 0.5
+DRIFT_MIN_RUNS = 10
+DRIFT_MIN_CHANGE = 0.05
+SESSION_GAP_MS = 3600 * 1000
+
+
+class Drift(t.NamedTuple):
+    """How the runs of a fzf_type got slower (or faster) during a session"""
+    fzf_type: str
+    session_start_ms: float
+    nrruns: int
+    # Spearman rank correlation of the start time and the relative deviation
+    # from the group median
+    rho: float
+    # change of the relative deviation from the first to the last run, of
+    # the least squares line through them
+    change: float
+
+    @property
+    def drifts(self) -> bool:
+        return (self.nrruns >= DRIFT_MIN_RUNS and abs(self.rho) >= DRIFT_RHO
+                and abs(self.change) >= DRIFT_MIN_CHANGE)
+
+    def __str__(self) -> str:
+        start = datetime.datetime.fromtimestamp(self.session_start_ms / 1000)
+        return (f"{self.fzf_type}, session of {start:%Y-%m-%d %H:%M}: "
+                f"rho {self.rho:+.2f} over {self.nrruns} runs, "
+                f"{self.change:+.1%} from first to last run"
+                + (", drifts" if self.drifts else ""))
+
+
+def sessionDrift(
+        table: RunTable,
+        values: np.ndarray,
+        keys: t.Sequence[str],
+        nrlines: t.Sequence[int],
+        where: t.Optional[np.ndarray] = None,
+        ) -> t.List[Drift]:
+    """
+    Per session and fzf_type in `keys`, whether its runs got slower in the
+    order they ran: the total of `values` of every run relative to the median
+    of its (fzf_type, nrlines) group, against the epoch ms of its `start`
+    event. Runs without a start time are left out.
+    """
+    totals = np.asarray(values, dtype=float).sum(axis=1)
+    start = table.events[:, RUN_EVENTS.index("start")]
+    valid = ~np.isnan(totals) & ~np.isnan(start)
+    if where is not None:
+        valid &= where
+    group = runGroups(table, keys, nrlines)
+    valid &= group >= 0
+    stats = aggregateRuns(table, totals[:, np.newaxis], keys, nrlines,
+                          where=valid)
+    median = stats.median.reshape(-1)[np.maximum(group, 0)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = totals / median - 1
+    valid &= np.isfinite(relative)
+
+    # sessions over all types, since they can take turns within one
+    order = np.flatnonzero(valid)[np.argsort(start[valid], kind="stable")]
+    session = np.full(len(totals), -1)
+    session[order] = np.cumsum(np.diff(start[order], prepend=-np.inf)
+                               > SESSION_GAP_MS) - 1
+    keyindex = np.where(group >= 0, group // len(nrlines), -1)
+
+    def ranks(x: np.ndarray) -> np.ndarray:
+        """Ranks of x, ties getting the average of their ranks"""
+        order = np.argsort(x, kind="stable")
+        sortedx = x[order]
+        first = np.concatenate([[True], sortedx[1:] != sortedx[:-1]])
+        starts = np.flatnonzero(first)
+        counts = np.diff(np.append(starts, len(x)))
+        result = np.empty(len(x))
+        result[order] = (starts + (counts - 1) / 2)[np.cumsum(first) - 1]
+        return result
+
+    drifts = []
+    for sessionindex in range(session.max(initial=-1) + 1):
+        insession = session == sessionindex
+        for index, key in enumerate(keys):
+            runs = insession & (keyindex == index)
+            if not runs.any():
+                continue
+            x = start[runs]
+            y = relative[runs]
+            if len(y) < 3 or np.ptp(x) == 0:
+                drifts.append(Drift(key, float(x.min()), len(y), np.nan,
+                                    np.nan))
+                continue
+            # NaN if all deviations are the same
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rho = np.corrcoef(ranks(x), ranks(y))[0, 1]
+            slope = np.polyfit(x - x.min(), y, 1)[0]
+            drifts.append(Drift(key, float(x.min()), len(y), float(rho),
+                                float(slope * np.ptp(x))))
+    return drifts
+
+
+def dropped_markdown_table(dropped: t.Sequence[DroppedRun]) -> str:
     return "\n".join(
         [
-            "|".join(["Haystack size", *[key for key in data]]),
-            "|".join(["---"] * (len(data) + 1)),
+            "|".join(["Dropped run", "Haystack size", "Total", "Median",
+                      "Reason"]),
+            "|".join(["---"] * 5),
+            *[
+                "|".join([
+                    run.fzf_type,
+                    f"2<sup>{LOG2_MAP[run.nrlines]}</sup> = {run.nrlines}",
+                    f"{run.total:.2f}",
+                    f"{run.median:.2f}",
+                    run.reason,
+                ])
+                for run in sorted(dropped, key=lambda run: (
+                    run.fzf_type, run.nrlines, run.index))
+            ]
+        ]
+    )
+
+
+def markdown_table(stats: RunStats, large_small_multiplier) -> str:
+    totals = stats.total("mean")
+
+    def cell(keyindex: int, nrindex: int, nr: int) -> str:
+        total = totals[keyindex, nrindex]
+        if np.isnan(total):
+            return "---"
+        text = f"{total:.2f}"
+        if stats.total_ci is not None:
+            low, high = stats.total_ci[keyindex, nrindex].tolist()
+            text += (" [---]" if np.isnan(low)
+                     else f" [{low:.2f}–{high:.2f}]")
+        return f"{text} ({total * large_small_multiplier / nr:.1f})"
+
+    return "\n".join(
+        [
+            "|".join(["Haystack size", *stats.keys]),
+            "|".join(["---"] * (len(stats.keys) + 1)),
             *[
                 "|".join([
                     f"2<sup>{LOG2_MAP[nr]}</sup> = {nr}",
-                    *["---" if np.isnan(dfk[nr])
-                      else
-                      f"{dfk[nr]:.2f} ({dfk[nr] * large_small_multiplier / nr:.1f})"
-                      for key, dfk in totaldata.items()],
+                    *[cell(keyindex, nrindex, nr)
+                      for keyindex in range(len(stats.keys))],
                 ])
-                for nr in list(data.values())[0]
+                for nrindex, nr in enumerate(stats.nrlines.tolist())
             ]
         ]
     )
@@ -308,35 +1656,51 @@ def markdown_table(data, large_small_multiplier) -> str:
 def do_create_table_and_plot(
         ax,
         nrlinesexp: t.Sequence[int],
-        data_element_getter: t.Callable[[RunData], t.Sequence[float]],
+        data_element_getter: t.Callable[[RunTable], np.ndarray],
         to_show: t.Sequence[t.Optional[str]],
         colourmap: t.Sequence[int],
         ylim: t.Tuple[float, float],
         large_small_multiplier: float=1e6,
+        confidence: t.Optional[float] = None,
+        fit_scaling: bool = False,
+        outliers: t.Optional[str] = None,
+        outlier_threshold: t.Optional[float] = None,
     ):
-    runDatas = loadRunData()
-    fzf_types = {r.fzf_type for r in runDatas}
-    assert all(key in fzf_types for key in to_show if key is not None)
-    data = {key: {2**nr: [] for nr in nrlinesexp}
-            for key in to_show if key is not None}
-    runData: RunData
+    """
+    With a `confidence` (like 0.95), the bootstrapped confidence interval of
+    every stacked total is drawn as an error bar and added to the table.
+    With `fit_scaling`, the best fitting cost model (see scaling.py) of every
+    total is drawn as a dashed line, and the models and knees are added to
+    the table.
+    With `outliers` ("mad", "iqr" or "trim", see findOutliers), outlying runs
+    are left out of the statistics, and listed below the table.
+    """
+    if fit_scaling and scaling is None:
+        raise RuntimeError("fit_scaling needs assetfactory/scaling.py, which "
+                           "is not importable; run through main.py")
+    keys = [key for key in to_show if key is not None]
+    nrlines = 2 ** np.asarray(nrlinesexp)
+    # only the runs that are shown are selected (or read)
+    table = loadRunTable(keys, nrlines.tolist())
+    fzf_types = set(table.runs["fzf_type"].tolist())
+    assert all(key in fzf_types for key in keys)
     datalength = len(colourmap)
-    for runData in runDatas:
-        if (
-                runData.aborted
-                or (key := runData.fzf_type) not in data
-                or (nrlines := runData.nrlines) not in data[key]):
-            continue
-        data[key][nrlines].append(data_element_getter(runData))
-        assert datalength == len(data[key][nrlines][-1])
-
-    # calculate averages
-    for key in data:
-        for nr in data[key]:
-            if data[key][nr]:
-                data[key][nr] = np.mean(data[key][nr], axis=0)
-            else:
-                data[key][nr] = np.full((datalength, ), np.nan)
+    # the getter sees the whole table of this selection, which is shared with
+    # the plots that show the same runs and (see loadRunTable) shares the
+    # grouping of the runs with the table of all runs, if that is loaded
+    values = np.asarray(data_element_getter(table), dtype=float)
+    assert values.shape == (len(table), datalength), values.shape
+
+    where = ~table.runs["aborted"]
+    dropped = []
+    if outliers is not None:
+        outlier, dropped = findOutliers(table, values, keys, nrlines, outliers,
+                                        outlier_threshold, where)
+        where &= ~outlier
+    stats = aggregateRuns(table, values, keys, nrlines,
+                          where=where,
+                          bootstrap=BOOTSTRAP_RESAMPLES if confidence else 0,
+                          confidence=confidence or 0.95)
 
     xaxis = nrlinesexp - nrlinesexp[0]
     ax.set_xticks(xaxis)
@@ -348,14 +1712,15 @@ def do_create_table_and_plot(
     nrgaps = len(bargap.strip()) - nrbars
     width = 0.9 / (nrbars + nrgaps / 2)
     x_offset = -0.45
+    fits = {}
     for label in to_show:
         if label is None:
             x_offset += width / 2
             continue
         bottom = np.zeros((len(xaxis), ))
         for a in range(datalength):
-            itemdata = np.array([data[label][2**exp][a] for exp in nrlinesexp]
-                                ) / 2**nrlinesexp * large_small_multiplier
+            itemdata = (stats.mean[stats.keys.index(label), :, a]
+                        / 2**nrlinesexp * large_small_multiplier)
             colour = COLOUR_MAP[label][colourmap[a]]
 
             ax.bar(xaxis[:] + x_offset,
@@ -365,7 +1730,318 @@ def do_create_table_and_plot(
                    color=colour,
                    label = label if a == min(1, datalength - 1) else None)
             bottom += itemdata
+        if stats.total_ci is not None:
+            ci = (stats.total_ci[stats.keys.index(label)].T
+                  / 2**nrlinesexp * large_small_multiplier)
+            ax.errorbar(xaxis[:] + x_offset, bottom,
+                        yerr=np.abs(ci - bottom),
+                        fmt="none",
+                        ecolor="#333333",
+                        elinewidth=.8,
+                        capsize=width * 10)
+        if fit_scaling:
+            fits[label] = plot_scaling_fit(
+                ax, nrlinesexp, stats.total()[stats.keys.index(label)],
+                xaxis[0] + x_offset, large_small_multiplier,
+                COLOUR_MAP[label][0])
         x_offset += width
 
     ax.set_ylim(*ylim)
-    return markdown_table(data, large_small_multiplier)
+    tabledata = markdown_table(stats, large_small_multiplier)
+    if fit_scaling:
+        tabledata += "\n\n" + scaling_markdown_table(fits)
+    if dropped:
+        tabledata += "\n\n" + dropped_markdown_table(dropped)
+    return tabledata
+
+
+def plot_scaling_fit(ax, nrlinesexp: t.Sequence[int], totals: np.ndarray,
+                     x_offset: float, large_small_multiplier: float,
+                     colour: str):
+    """
+    Draws the best fitting model for `totals` (one per haystack size), per
+    straw, over the bars at `x_offset`. Returns (fit, knee).
+    """
+    nrlines = 2.0 ** np.asarray(nrlinesexp)
+    best = scaling.best_fit(nrlines, totals)
+    exps = np.linspace(nrlinesexp[0], nrlinesexp[-1], 100)
+    ax.plot(exps - nrlinesexp[0] + x_offset,
+            best.predict(2 ** exps) / 2 ** exps * large_small_multiplier,
+            color=colour, linestyle="--", linewidth=1)
+    return best, scaling.knee(nrlines, totals)
+
+
+def scaling_markdown_table(fits: t.Mapping[str, t.Tuple[t.Any, t.Optional[int]]]
+                           ) -> str:
+    return "\n".join(
+        [
+            "|".join(["Implementation", "Best fit", "Error", "Knee"]),
+            "|".join(["---"] * 4),
+            *[
+                "|".join([
+                    label,
+                    str(best),
+                    f"{best.error * 100:.1f}%",
+                    "---" if knee is None
+                    else f"2<sup>{LOG2_MAP[knee]}</sup> = {knee}",
+                ])
+                for label, (best, knee) in fits.items()
+            ]
+        ]
+    )
+
+
+PHASES = (
+    "Load code",
+    "Load haystack",
+    "Parse haystack",
+    "Initialize",
+    "Search",
+    "Return results",
+)
+
+# the phase that the time between the previous logged event and this one is
+# spent in; "start" is the origin of every run
+_RUN_EVENT_PHASES = {
+    "start": None,
+    "js/wasm loaded": "Load code",
+    "lines.txt loaded": "Load haystack",
+    "startTimeSet": "Initialize",
+    "newStart": "Initialize",
+    "newFinishedParse": "Parse haystack",
+    "newDone": "Initialize",
+    "Fzf initialized": "Initialize",
+}
+_SEARCH_EVENT_PHASES = {
+    "Result ready to send": "Search",
+    "Search done": "Return results",
+    "Result sent": "Return results",
+}
+
+
+def phaseDurations(table: RunTable) -> np.ndarray:
+    """
+    Runs × PHASES array with the ms spent in every phase, summed over all
+    searches, as derived from the logged events. Every interval between two
+    consecutive events is attributed to the phase of the later event. For
+    runs that did not log the search events (native) the search phase is the
+    sum of the search times; phases without events are 0.
+    """
+    nrruns = len(table)
+    timeline = np.concatenate([
+        table.events,
+        table.search_events.transpose(0, 2, 1).reshape((nrruns, -1)),
+    ], axis=1)
+    phaseindex = np.array(
+        [-1 if (phase := _RUN_EVENT_PHASES[name]) is None
+         else PHASES.index(phase) for name in RUN_EVENTS]
+        + [PHASES.index(_SEARCH_EVENT_PHASES[name])
+           for _ in SEARCH_TERMS for name in SEARCH_EVENTS])
+    phaseindex = np.broadcast_to(phaseindex, timeline.shape).copy()
+    # without a "Result ready to send" (fzf-for-js) the interval that ends at
+    # "Search done" is the search itself
+    searchdone = len(RUN_EVENTS) + np.arange(len(SEARCH_TERMS)) * len(
+        SEARCH_EVENTS) + SEARCH_EVENTS.index("Search done")
+    noready = np.isnan(timeline[:, searchdone - 1])
+    phaseindex[:, searchdone] = np.where(
+        noready, PHASES.index("Search"), phaseindex[:, searchdone])
+
+    # timestamp of the previous logged event, for every event
+    present = ~np.isnan(timeline)
+    lastpresent = np.maximum.accumulate(
+        np.where(present, np.arange(timeline.shape[1]), -1), axis=1)
+    previous = np.concatenate(
+        [np.full((nrruns, 1), -1), lastpresent[:, :-1]], axis=1)
+    previoustime = np.take_along_axis(timeline, np.maximum(previous, 0), axis=1)
+    durations = np.where(present & (previous >= 0), timeline - previoustime, 0)
+
+    result = np.stack([
+        np.where(phaseindex == index, durations, 0).sum(axis=1)
+        for index in range(len(PHASES))], axis=1)
+    nosearchevents = ~present[:, len(RUN_EVENTS):].any(axis=1)
+    result[nosearchevents, PHASES.index("Search")] = np.nansum(
+        table.search_time_ms[nosearchevents], axis=1)
+    return result
+
+
+# per phase its hatching, and how much lighter (%) than the implementation's
+# colour its bars are; 0 is the colour itself
+PHASE_HATCHES = ("", "..", "//", "xx", "--", "\\\\")
+PHASE_SHADES = (0, 15, 30, 45, 60, 75)
+
+
+def phase_colours(colour: str) -> t.Sequence[str]:
+    """`colour` in the shade of every phase (see PHASE_SHADES)"""
+    lighter = [row[0] for row in lighten([colour], PHASE_SHADES[1:])]
+    return [colour, *lighter]
+
+
+def phase_markdown_table(stats: RunStats) -> str:
+    return "\n".join(
+        [
+            "|".join(["Haystack size", "Implementation", *PHASES, "Total"]),
+            "|".join(["---"] * (len(PHASES) + 3)),
+            *[
+                "|".join([
+                    f"2<sup>{LOG2_MAP[nr]}</sup> = {nr}",
+                    key,
+                    *["---" if np.isnan(value) else f"{value:.0f}"
+                      for value in stats.mean[keyindex, nrindex].tolist()],
+                    "---" if np.isnan(total := stats.total()[keyindex, nrindex])
+                    else f"{total:.0f}",
+                ])
+                for nrindex, nr in enumerate(stats.nrlines.tolist())
+                for keyindex, key in enumerate(stats.keys)
+            ]
+        ]
+    )
+
+
+def do_create_phase_plot(
+        ax,
+        nrlinesexp: t.Sequence[int],
+        to_show: t.Sequence[str],
+        ylim: t.Tuple[float, float],
+    ):
+    """
+    Stacked bars of the time per straw (µs) spent in every phase (see
+    phaseDurations), per implementation and haystack size. Implementations
+    are told apart by colour, phases by hatching and shade; the table holds
+    the mean ms per phase.
+    """
+    nrlines = 2 ** np.asarray(nrlinesexp)
+    table = loadRunTable(to_show, nrlines.tolist())
+    stats = aggregateRuns(table, phaseDurations(table), to_show, nrlines,
+                          where=~table.runs["aborted"])
+
+    xaxis = nrlinesexp - nrlinesexp[0]
+    ax.set_xticks(xaxis)
+    ax.set_xticklabels([f"$2^{{{exp}}}$" for exp in nrlinesexp], rotation=45)
+    width = 0.9 / len(to_show)
+    for keyindex, label in enumerate(to_show):
+        colours = phase_colours(COLOUR_MAP[label][0])
+        bottom = np.zeros((len(xaxis), ))
+        for phaseindex, phase in enumerate(PHASES):
+            itemdata = stats.mean[keyindex, :, phaseindex] / nrlines * 1000
+            ax.bar(xaxis - 0.45 + (keyindex + .5) * width,
+                   itemdata,
+                   bottom=bottom,
+                   width=width,
+                   color=colours[phaseindex],
+                   hatch=PHASE_HATCHES[phaseindex],
+                   edgecolor="#f3f3f3",
+                   linewidth=0,
+                   label=label if phaseindex == 0 else None)
+            bottom += np.nan_to_num(itemdata)
+
+    handles, labels = ax.get_legend_handles_labels()
+    phasehandles = [
+        matplotlib.patches.Patch(facecolor=colour, edgecolor="#f3f3f3",
+                                 linewidth=0, hatch=hatch, label=phase)
+        for phase, hatch, colour
+        in zip(PHASES, PHASE_HATCHES, phase_colours("#999999"))]
+    ax.legend(handles=handles + phasehandles, ncol=2, loc="upper left")
+    ax.set_ylim(*ylim)
+    return phase_markdown_table(stats)
+
+
+# latencies (ms) at which typing stops feeling smooth (one frame at 60 fps)
+# and stops feeling instantaneous
+FRAME_BUDGETS_MS = (16, 100)
+
+
+def keystrokeLatencies(table: RunTable,
+                       budgets: t.Sequence[float] = FRAME_BUDGETS_MS
+                       ) -> np.ndarray:
+    """
+    Runs × (SEARCH_TERMS + budgets) array: the latency (ms) of every
+    keystroke, which is the search time of the prefix typed so far, followed
+    by the fraction of the run's keystrokes that took longer than every
+    budget.
+    """
+    latencies = table.search_time_ms
+    typed = np.maximum((~np.isnan(latencies)).sum(axis=1), 1)
+    overbudget = [(latencies > budget).sum(axis=1) / typed
+                  for budget in budgets]
+    return np.column_stack([latencies, *overbudget])
+
+
+def keystroke_markdown_table(stats: RunStats,
+                             budgets: t.Sequence[float]) -> str:
+    nrterms = len(SEARCH_TERMS)
+
+    def cells(keyindex: int, nrindex: int) -> t.Sequence[str]:
+        if not stats.count[keyindex, nrindex]:
+            return ["---"] * (3 + len(budgets))
+        medians = stats.median[keyindex, nrindex, :nrterms]
+        worst = int(np.argmax(medians))
+        return [
+            f"{np.median(medians):.0f}",
+            f"'{SEARCH_TERMS[worst]}' ({medians[worst]:.0f})",
+            f"{stats.max[keyindex, nrindex, :nrterms].max():.0f}",
+            *[f"{share * 100:.0f}%"
+              for share in stats.mean[keyindex, nrindex, nrterms:].tolist()],
+        ]
+
+    return "\n".join(
+        [
+            "|".join(["Haystack size", "Implementation",
+                      "Median keystroke (ms)", "Worst keystroke (median ms)",
+                      "Slowest keystroke (ms)",
+                      *[f"> {budget} ms" for budget in budgets]]),
+            "|".join(["---"] * (5 + len(budgets))),
+            *[
+                "|".join([
+                    f"2<sup>{LOG2_MAP[nr]}</sup> = {nr}",
+                    key,
+                    *cells(keyindex, nrindex),
+                ])
+                for nrindex, nr in enumerate(stats.nrlines.tolist())
+                for keyindex, key in enumerate(stats.keys)
+            ]
+        ]
+    )
+
+
+def do_create_keystroke_plot(
+        ax,
+        nrlinesexp: t.Sequence[int],
+        to_show: t.Sequence[str],
+        plotexp: int,
+        budgets: t.Sequence[float] = FRAME_BUDGETS_MS,
+        band: t.Tuple[float, float] = (10, 90),
+    ):
+    """
+    The latency of every keystroke of typing "hello world" in a haystack of
+    2^plotexp lines: the median over the runs as a line, and the `band`
+    percentiles as a shaded area, with the `budgets` as horizontal lines.
+    The table has, for all `nrlinesexp`, the median keystroke, the keystroke
+    with the highest median latency, the slowest single keystroke and the
+    share of keystrokes over every budget.
+    """
+    nrlines = 2 ** np.asarray(nrlinesexp)
+    table = loadRunTable(to_show, nrlines.tolist())
+    stats = aggregateRuns(table, keystrokeLatencies(table, budgets), to_show,
+                          nrlines, percentiles=(50, *band),
+                          where=~table.runs["aborted"])
+
+    nrindex = list(nrlinesexp).index(plotexp)
+    nrterms = len(SEARCH_TERMS)
+    xaxis = np.arange(nrterms)
+    ax.set_xticks(xaxis)
+    ax.set_xticklabels([f"'{term}'" for term in SEARCH_TERMS], rotation=45)
+    ax.set_yscale("log")
+    for keyindex, label in enumerate(to_show):
+        colour = COLOUR_MAP[label][0]
+        ax.fill_between(xaxis,
+                        stats.percentiles[band[0]][keyindex, nrindex, :nrterms],
+                        stats.percentiles[band[1]][keyindex, nrindex, :nrterms],
+                        color=colour, alpha=.2, linewidth=0)
+        ax.plot(xaxis, stats.median[keyindex, nrindex, :nrterms],
+                color=colour, marker=".", label=label)
+    for budget in budgets:
+        ax.axhline(budget, color="#666666", linestyle=":", linewidth=.8)
+        ax.text(xaxis[-1], budget, f"{budget} ms", color="#666666",
+                ha="right", va="bottom", fontsize="small")
+    ax.legend(ncol=2, loc="upper right")
+    return keystroke_markdown_table(stats, budgets)
@@ -0,0 +1,29 @@
+import importlib
+import pathlib
+
+import numpy as np
+
+basefilename = pathlib.Path(__file__).parent / "base.py"
+spec = importlib.util.spec_from_file_location("base", basefilename)
+base = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(base)
+
+
+def create_plot(ax):
+    tabledata = base.do_create_keystroke_plot(
+        ax,
+        np.arange(10, 25),
+        to_show = (
+            "Go (native)",
+            "Go (WebAssembly)",
+            "TinyGo",
+            "fzf-for-js",
+            "GopherJS",
+        ),
+        plotexp=16,
+    )
+
+    ax.set_title("Latency per keystroke while typing, haystack of $2^{16}$")
+    ax.set_xlabel("Typed so far")
+    ax.set_ylabel("Latency (ms)")
+    return tabledata
@@ -13,7 +13,7 @@ def create_plot(ax):
     tabledata = base.do_create_table_and_plot(
         ax,
         np.arange(10, 25),
-        lambda runData: np.array([runData.memory_used_mib]),
+        lambda table: table.runs["memory_used_mib"][:, np.newaxis],
         to_show = (
             "Go (native)",
             "Go (WebAssembly)",
@@ -17,9 +17,9 @@ def create_plot(ax):
     tabledata = base.do_create_table_and_plot(
         ax,
         np.arange(17, 22),
-        lambda runData: np.array([
-            runData.fzf_init_time_ms,
-            *[i[0] for i in runData.search_times_ms_nr_results.values()]
+        lambda table: np.column_stack([
+            table.runs["fzf_init_time_ms"],
+            table.search_time_ms,
         ]) / 1000,
         to_show = to_show,
         colourmap = [2] * (len("hello world") + 1),
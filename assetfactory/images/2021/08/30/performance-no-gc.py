@@ -13,10 +13,11 @@ def create_plot(ax):
     tabledata = base.do_create_table_and_plot(
         ax,
         np.arange(15, 22),
-        lambda runData: np.array([
-            i[0] if i[1] is None else i[1]
-            for i in runData.search_times_ms_nr_results.values()
-        ]) / 1000,
+        lambda table: np.where(
+            np.isnan(table.go_search_time_ms),
+            table.search_time_ms,
+            table.go_search_time_ms,
+        ) / 1000,
         to_show = (
             "Go (native)",
             "Go (native; no GC)",
@@ -26,7 +27,8 @@ def create_plot(ax):
             "TinyGo (no GC)",
         ),
         colourmap = [0] * len("hello") + [1] * len(" world"),
-        ylim=(0, 20)
+        ylim=(0, 20),
+        confidence=0.95,
     )
 
     ax.set_title("Runtime use divided by size of the haystack")
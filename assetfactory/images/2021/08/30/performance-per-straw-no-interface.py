@@ -12,10 +12,11 @@ def create_plot(ax):
     tabledata = base.do_create_table_and_plot(
         ax,
         np.arange(10, 25),
-        lambda runData: np.array([
-            i[0] if i[1] is None else i[1]
-            for i in runData.search_times_ms_nr_results.values()
-        ]) / 1000,
+        lambda table: np.where(
+            np.isnan(table.go_search_time_ms),
+            table.search_time_ms,
+            table.go_search_time_ms,
+        ) / 1000,
         to_show = (
             "Go (native)",
             "Go (WebAssembly)",
@@ -24,7 +25,8 @@ def create_plot(ax):
             "GopherJS",
         ),
         colourmap = [0] * len("hello") + [1] * len(" world"),
-        ylim=(0, 50)
+        ylim=(0, 50),
+        confidence=0.95,
     )
 
     ax.set_title("Runtime use divided by size of the haystack")
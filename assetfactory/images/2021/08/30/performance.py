@@ -13,9 +13,9 @@ def create_plot(ax):
     tabledata = base.do_create_table_and_plot(
         ax,
         np.arange(10, 25),
-        lambda runData: np.array([
-            runData.fzf_init_time_ms,
-            *[i[0] for i in runData.search_times_ms_nr_results.values()]
+        lambda table: np.column_stack([
+            table.runs["fzf_init_time_ms"],
+            table.search_time_ms,
         ]) / 1000,
         to_show = (
             "Go (native)",
@@ -25,7 +25,9 @@ def create_plot(ax):
             "GopherJS",
         ),
         colourmap = [2] + [0] * len("hello") + [1] * len(" world"),
-        ylim=(0, 100)
+        ylim=(0, 100),
+        confidence=0.95,
+        fit_scaling=True,
     )
 
     ax.set_title("Runtime use divided by size of the haystack")
@@ -0,0 +1,29 @@
+import importlib
+import pathlib
+
+import numpy as np
+
+basefilename = pathlib.Path(__file__).parent / "base.py"
+spec = importlib.util.spec_from_file_location("base", basefilename)
+base = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(base)
+
+
+def create_plot(ax):
+    tabledata = base.do_create_phase_plot(
+        ax,
+        np.arange(15, 22),
+        to_show = (
+            "Go (native)",
+            "Go (WebAssembly)",
+            "TinyGo",
+            "fzf-for-js",
+            "GopherJS",
+        ),
+        ylim=(0, 160),
+    )
+
+    ax.set_title("Where the time goes, divided by size of the haystack")
+    ax.set_xlabel("Haystack size")
+    ax.set_ylabel("Time per straw (µs)")
+    return tabledata
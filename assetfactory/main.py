@@ -1,22 +1,55 @@
 import argparse
+import concurrent.futures
+import functools
 import importlib
 import logging
+import os
 import pathlib
+import time
 import typing
 
+import matplotlib
 import matplotlib.pyplot as plt
 
+import buildgraph
+import manifest
+import output
+import profiling
+
 logger = logging.getLogger()
 
-def process_file(filename: pathlib.Path):
+def build_options(formats: typing.Sequence[str],
+                  optimize_svg: bool) -> typing.Mapping[str, typing.Any]:
+    """The options that outputs depend on, as stored in the manifest"""
+    return {"formats": list(formats), "optimize_svg": optimize_svg}
+
+
+def process_file(filename: pathlib.Path, profile: bool = False,
+                 profile_dir: typing.Optional[pathlib.Path] = None,
+                 formats: typing.Sequence[str] = ("svg",),
+                 optimize_svg: bool = False) -> manifest.BuildRecord:
     if not filename.is_file():
         raise Exception("File does not exist: %s" % filename)
-    spec = importlib.util.spec_from_file_location("module", filename)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    _fig, ax = plt.subplots(figsize=(8,6), facecolor="#f3f3f3")
-    ax.set_facecolor("#f3f3f3")
-    tabledata = module.create_plot(ax)
+    profiler = profiling.StageProfiler(filename, profile, profile_dir)
+    with profiler.profile():
+        return _process_file(filename, profiler, formats, optimize_svg)
+
+
+def _process_file(filename: pathlib.Path,
+                  profiler: profiling.StageProfiler,
+                  formats: typing.Sequence[str],
+                  optimize_svg: bool) -> manifest.BuildRecord:
+    with manifest.record_inputs() as inputs:
+        with profiler.stage("load module"):
+            spec = importlib.util.spec_from_file_location("module", filename)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        fig, ax = plt.subplots(figsize=(8,6), facecolor="#f3f3f3")
+        ax.set_facecolor("#f3f3f3")
+        with profiler.stage("create_plot"):
+            tabledata = module.create_plot(ax)
+    inputs.update(buildgraph.all_dependencies(filename))
+    outputs = []
 
     here = pathlib.Path(__file__).resolve().parent
     relative = filename.relative_to(here)
@@ -25,9 +58,10 @@ def process_file(filename: pathlib.Path):
     if not target.parent.exists():
         target.parent.mkdir(parents=True)
         logger.info("Created directory %s", target.parent)
-    plt.tight_layout(pad=.2)
-    plt.savefig(target)
-    logger.info("Wrote %s", target)
+    with profiler.stage("tight_layout"):
+        plt.tight_layout(pad=.2)
+    with profiler.stage("savefig"):
+        outputs.extend(output.save_figure(fig, target, formats, optimize_svg))
 
     if tabledata:
         tables = here.parent / "_posts" / "tables"
@@ -35,28 +69,175 @@ def process_file(filename: pathlib.Path):
         if not target.parent.exists():
             target.parent.mkdir(parents=True)
             logger.info("Created directory %s", target.parent)
-        target.write_text(tabledata)
+        with profiler.stage("write table"):
+            target.write_text(tabledata)
         logger.info("Wrote %s", target)
+        outputs.append(target)
+    plt.close(fig)
+    return manifest.BuildRecord.create(
+        inputs, outputs, build_options(formats, optimize_svg))
+
+
+def init_worker(jobs: int):
+    """
+    Runs once in every worker process of the --jobs pool; each worker draws
+    on its own non-interactive figure state, and parses results logs on its
+    share of the cores (see PARSE_WORKERS in base.py).
+    """
+    os.environ["ASSETFACTORY_PARSE_WORKERS"] = str(
+        max(1, (os.cpu_count() or 1) // jobs))
+    logging.basicConfig(level=logging.INFO)
+    matplotlib.use("Agg")
+    plt.close("all")
+
+
+def process_file_logged(
+        filename: pathlib.Path, **kwargs) -> typing.Optional[manifest.BuildRecord]:
+    try:
+        return process_file(filename, **kwargs)
+    except Exception:
+        logger.exception("Problem with %r", filename)
+        return None
+
+
+def watch(filenames: typing.Sequence[pathlib.Path],
+          buildmanifest: manifest.Manifest,
+          process: typing.Callable[
+              [pathlib.Path], typing.Optional[manifest.BuildRecord]],
+          interval: float = 0.2):
+    """
+    Keeps re-rendering, in this process, every script in `filenames` whose
+    inputs (as recorded in the manifest) changed since the last render.
+    """
+    def stamps() -> typing.Mapping[pathlib.Path, typing.Optional[int]]:
+        result = {}
+        for filename in filenames:
+            for path in buildmanifest.inputs(filename):
+                try:
+                    result[path] = path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    result[path] = None
+        return result
+
+    matplotlib.use("Agg")
+    seen = stamps()
+    logger.info("Watching %d files, press Ctrl-C to stop", len(seen))
+    try:
+        while True:
+            time.sleep(interval)
+            current = stamps()
+            changed = {path for path, stamp in current.items()
+                       if seen.get(path) != stamp}
+            seen = current
+            if not changed:
+                continue
+            for filename in filenames:
+                if changed.isdisjoint(buildmanifest.inputs(filename)):
+                    continue
+                start = time.perf_counter()
+                record = process(filename)
+                if record is not None:
+                    buildmanifest.update(filename, record)
+                    logger.info("Rendered %s in %.2f s", filename.name,
+                                time.perf_counter() - start)
+            buildmanifest.write()
+            seen = stamps()
+    except KeyboardInterrupt:
+        pass
+
+
+def output_formats(value: str) -> typing.Sequence[str]:
+    formats = value.split(",")
+    if unknown := set(formats) - set(output.FORMATS):
+        raise argparse.ArgumentTypeError(
+            "unknown format(s): %s" % ", ".join(sorted(unknown)))
+    return formats
 
 
 def run():
     logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
-    parser.add_argument("filename", nargs="+")
+    parser.add_argument("filename", nargs="*")
+    parser.add_argument("--all", action="store_true",
+                        help="Render every plot script under images/, in "
+                        "dependency order")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of files to render in parallel")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even if the inputs did not change")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running, and re-render files whose inputs "
+                        "change")
+    parser.add_argument("--format", type=output_formats, default=["svg"],
+                        dest="formats",
+                        help="Comma separated output formats for the charts "
+                        f"({', '.join(output.FORMATS)})")
+    parser.add_argument("--optimize-svg", action="store_true",
+                        help="Write smaller SVGs: text as text, merged bar "
+                        "paths, rounded coordinates, no metadata")
+    parser.add_argument("--profile", action="store_true",
+                        help="Log time and peak memory of every stage")
+    parser.add_argument("--profile-dir", type=pathlib.Path,
+                        help="Also write a cProfile dump per file and "
+                        "metrics.jsonl to this directory (implies --profile)")
     args = parser.parse_args()
+    if not args.filename and not args.all:
+        parser.error("give the files to render, or --all")
 
     filenames = [pathlib.Path(filename).resolve() for filename in args.filename]
-    completed_filenames: typing.Sequence[pathlib.Path] = []
+    buildmanifest = manifest.Manifest()
+    if args.all:
+        filenames.extend(filename for filename
+                         in buildgraph.find_plot_scripts()
+                         if filename not in filenames)
+    graph = buildgraph.BuildGraph(filenames, buildmanifest)
+    schedule = graph.schedule()
+    helpers = set(graph.helpers())
+    filenames = [filename for filename in schedule if filename not in helpers]
+    process = functools.partial(
+        process_file_logged, profile=args.profile,
+        profile_dir=args.profile_dir and args.profile_dir.resolve(),
+        formats=args.formats, optimize_svg=args.optimize_svg)
+    options = build_options(args.formats, args.optimize_svg)
+    completed_filenames: typing.MutableSequence[pathlib.Path] = []
+    stale_filenames: typing.MutableSequence[pathlib.Path] = []
     for filename in filenames:
-        try:
-            process_file(filename)
-        except Exception:
-            logger.exception("Problem with %r", filename)
+        if not args.force and buildmanifest.is_up_to_date(
+                filename, options, buildgraph.all_dependencies(filename)):
+            logger.info("Up to date: %s", filename)
+            completed_filenames.append(filename)
         else:
+            stale_filenames.append(filename)
+
+    # shared data is loaded once, before the charts that need it (and,
+    # forked, by the workers of the pool)
+    for helper in schedule:
+        if helper in helpers and any(helper in graph.dependencies[filename]
+                                     for filename in stale_filenames):
+            try:
+                buildgraph.prepare(helper)
+                logger.info("Prepared %s", helper)
+            except Exception:
+                logger.exception("Problem preparing %r", helper)
+
+    if args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=args.jobs, initializer=init_worker,
+                initargs=(args.jobs, )) as executor:
+            records = list(executor.map(process, stale_filenames))
+    else:
+        records = [process(filename) for filename in stale_filenames]
+    for filename, record in zip(stale_filenames, records):
+        if record is not None:
+            buildmanifest.update(filename, record)
             completed_filenames.append(filename)
+    buildmanifest.write()
 
-    logger.info("Done, handled %d / %d files successfully",
-                len(completed_filenames), len(filenames))
+    logger.info("Done, handled %d / %d files successfully (%d up to date)",
+                len(completed_filenames), len(filenames),
+                len(filenames) - len(stale_filenames))
+    if args.watch:
+        watch(filenames, buildmanifest, process)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Build manifest for incremental asset builds.
+
+While a plot script is processed, every file it reads from inside the
+assetfactory directory (the script itself, helpers like base.py that it loads
+through `spec_from_file_location`, result logs, ...) is recorded through an
+audit hook (or, for data that was already loaded in this process, declared
+through the dataset module). The manifest stores the content hash of each of these inputs,
+so a next build can skip every script whose inputs did not change.
+"""
+from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import typing as t
+
+import dataset
+
+HERE = pathlib.Path(__file__).resolve().parent
+CACHE_DIR_NAME = ".cache"
+MANIFEST_PATH = HERE / CACHE_DIR_NAME / "manifest.json"
+
+_recorded_inputs: t.Optional[t.MutableSet[pathlib.Path]] = None
+
+
+def file_digest(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_read(mode: t.Optional[str], flags: int) -> bool:
+    if mode is None:
+        return flags & (os.O_WRONLY | os.O_RDWR) == 0
+    return not any(c in mode for c in "wax+")
+
+
+def _audit_hook(event: str, args: t.Tuple) -> None:
+    if _recorded_inputs is None:
+        return
+    if event == dataset.INPUT_EVENT:
+        path, mode, flags = args[0], "r", 0
+    elif event == "open":
+        path, mode, flags = args
+    else:
+        return
+    if not isinstance(path, (str, bytes, os.PathLike)):
+        return  # opening a file descriptor
+    if not _is_read(mode, flags or 0):
+        return
+    path = pathlib.Path(os.fsdecode(path)).resolve()
+    if (HERE not in path.parents
+            or CACHE_DIR_NAME in path.parts
+            or "__pycache__" in path.parts):
+        return
+    if path.is_file():
+        _recorded_inputs.add(path)
+
+
+sys.addaudithook(_audit_hook)
+
+
+@contextlib.contextmanager
+def record_inputs() -> t.Iterator[t.MutableSet[pathlib.Path]]:
+    """
+    Collects the files read (inside the assetfactory directory) while the
+    context is active.
+    """
+    global _recorded_inputs
+    previous = _recorded_inputs
+    _recorded_inputs = inputs = set()
+    try:
+        yield inputs
+    finally:
+        _recorded_inputs = previous
+
+
+class BuildRecord(t.NamedTuple):
+    inputs: t.Mapping[str, str]
+    outputs: t.Sequence[str]
+    # the command line options that the outputs were written with (like
+    # --format); records without them are from before they were stored
+    options: t.Mapping[str, t.Any] = {}
+
+    @classmethod
+    def create(cls, inputs: t.Iterable[pathlib.Path],
+               outputs: t.Iterable[pathlib.Path],
+               options: t.Mapping[str, t.Any]) -> BuildRecord:
+        return cls(
+            inputs={_key(path): file_digest(path) for path in sorted(inputs)},
+            outputs=[_key(path) for path in outputs],
+            options=dict(options),
+        )
+
+
+def _key(path: pathlib.Path) -> str:
+    return os.path.relpath(path, HERE)
+
+
+class Manifest:
+    def __init__(self, path: pathlib.Path = MANIFEST_PATH):
+        self.path = path
+        try:
+            raw = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            raw = {}
+        self.records: t.MutableMapping[str, BuildRecord] = {
+            key: BuildRecord(**value) for key, value in raw.items()}
+
+    def is_up_to_date(self, filename: pathlib.Path,
+                      options: t.Mapping[str, t.Any],
+                      dependencies: t.Iterable[pathlib.Path] = ()) -> bool:
+        """
+        Whether the outputs of `filename` exist, were written with the same
+        `options` and none of its inputs changed since. `dependencies` that
+        are known from elsewhere (see buildgraph.all_dependencies) have to be
+        among the recorded inputs.
+        """
+        record = self.records.get(_key(filename))
+        if record is None or record.options != options:
+            return False
+        if any(_key(path) not in record.inputs for path in dependencies):
+            return False
+        if not all((HERE / output).is_file() for output in record.outputs):
+            return False
+        for inputfile, digest in record.inputs.items():
+            path = HERE / inputfile
+            if not path.is_file() or file_digest(path) != digest:
+                return False
+        return True
+
+    def inputs(self, filename: pathlib.Path) -> t.Sequence[pathlib.Path]:
+        record = self.records.get(_key(filename))
+        return [HERE / path for path in record.inputs] if record else [filename]
+
+    def update(self, filename: pathlib.Path, record: BuildRecord) -> None:
+        self.records[_key(filename)] = record
+
+    def write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(
+            {key: record._asdict() for key, record in self.records.items()},
+            indent=2, sort_keys=True))
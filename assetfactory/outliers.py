@@ -0,0 +1,61 @@
+"""
+Reports the runs that base.findOutliers() would leave out of the 2021/08/30
+charts, and whether implementations got slower (or faster) in the course of
+a benchmark session (base.sessionDrift):
+
+    python outliers.py --method iqr
+    python outliers.py --method mad --threshold 5 results-mine.txt
+
+Both look at the total of the init and search times of every run. The exit
+status is 1 if any implementation drifts.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import pathlib
+import sys
+
+import numpy as np
+
+from benchmark import load_base
+
+logger = logging.getLogger()
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    base = load_base()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filename", type=pathlib.Path, nargs="*",
+                        help="Results logs (default: those of the charts)")
+    parser.add_argument("--method", default="mad",
+                        choices=list(base.OUTLIER_THRESHOLDS))
+    parser.add_argument("--threshold", type=float,
+                        help="Default: " + ", ".join(
+                            f"{threshold:g} for {method}" for method, threshold
+                            in base.OUTLIER_THRESHOLDS.items()))
+    args = parser.parse_args()
+
+    catalog = base.Catalog(args.filename) if args.filename else None
+    table = base.loadRunTable(catalog=catalog)
+    keys = sorted(set(table.runs["fzf_type"][~table.runs["aborted"]].tolist()))
+    nrlines = np.unique(table.runs["nrlines"][~np.isnan(table.runs["nrlines"])])
+    values = np.column_stack([table.runs["fzf_init_time_ms"],
+                              table.search_time_ms])
+    where = ~table.runs["aborted"]
+
+    _outlier, dropped = base.findOutliers(table, values, keys, nrlines,
+                                          args.method, args.threshold, where)
+    for droppedrun in dropped:
+        logger.info("%s", droppedrun)
+    logger.info("%d of %d runs dropped", len(dropped), np.count_nonzero(where))
+
+    drifts = base.sessionDrift(table, values, keys, nrlines, where)
+    for drift in drifts:
+        (logger.warning if drift.drifts else logger.info)("%s", drift)
+    if any(drift.drifts for drift in drifts):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
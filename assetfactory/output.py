@@ -0,0 +1,119 @@
+"""
+Writing rendered figures to disk: SVG (optionally size-optimized) and PNG /
+WebP variants, all from one rendered figure.
+"""
+from __future__ import annotations
+import io
+import logging
+import pathlib
+import re
+import typing as t
+import xml.etree.ElementTree as ET
+
+import matplotlib
+import matplotlib.figure
+
+logger = logging.getLogger()
+
+FORMATS = ("svg", "png", "webp")
+
+# Fixed salt and no date so repeated (and parallel) builds are byte-identical
+matplotlib.rcParams["svg.hashsalt"] = "assetfactory"
+SVG_METADATA = {"Date": None}
+# leaving all keys out drops the whole <metadata> block
+NO_SVG_METADATA = {"Date": None, "Creator": None, "Format": None, "Type": None}
+
+RASTER_DPI = 150
+COORDINATE_DECIMALS = 2
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+_NUMBER_RE = re.compile(r"-?\d+\.\d+")
+_COORDINATE_ATTRIBUTES = ("d", "x", "y", "x1", "x2", "y1", "y2", "width",
+                          "height", "transform", "points")
+
+
+def _round_numbers(value: str) -> str:
+    def rounded(match: re.Match) -> str:
+        number = round(float(match.group()), COORDINATE_DECIMALS)
+        text = f"{number:.{COORDINATE_DECIMALS}f}".rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    return _NUMBER_RE.sub(rounded, value)
+
+
+def _merge_paths(parent: ET.Element) -> int:
+    """
+    Merges runs of sibling <g><path/></g> groups (like the bars of a single
+    ax.bar call) whose paths differ only in their `d` into one path. Only
+    adjacent groups are merged, so the drawing order stays the same.
+    Returns the number of removed groups.
+    """
+    removed = 0
+    previous: t.Optional[ET.Element] = None
+    previouskey = None
+    for child in list(parent):
+        key = None
+        if (child.tag == f"{{{SVG_NS}}}g" and len(child) == 1
+                and set(child.attrib) <= {"id"}
+                and child[0].tag == f"{{{SVG_NS}}}path" and not len(child[0])):
+            key = tuple(sorted((name, value) for name, value
+                               in child[0].attrib.items() if name != "d"))
+        if key is not None and key == previouskey:
+            path = previous[0]
+            path.set("d", path.get("d", "") + " " + child[0].get("d", ""))
+            parent.remove(child)
+            removed += 1
+            continue
+        previous, previouskey = child, key
+        removed += _merge_paths(child)
+    return removed
+
+
+def optimize_svg(data: bytes) -> bytes:
+    """Merges identical bar paths and rounds coordinates"""
+    root = ET.fromstring(data)
+    _merge_paths(root)
+    for element in root.iter():
+        for name in _COORDINATE_ATTRIBUTES:
+            if (value := element.get(name)) is not None:
+                element.set(name, " ".join(_round_numbers(value).split()))
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def save_figure(fig: matplotlib.figure.Figure, target: pathlib.Path,
+                formats: t.Sequence[str] = ("svg",),
+                optimize: bool = False) -> t.Sequence[pathlib.Path]:
+    """
+    Writes `fig` as `target` with the suffix of every requested format.
+    Optimized SVGs keep text as <text> (instead of glyph paths), have no
+    metadata, merged bar paths and rounded coordinates.
+    """
+    written = []
+    for fmt in formats:
+        path = target.with_suffix(f".{fmt}")
+        if fmt == "svg" and optimize:
+            buffer = io.BytesIO()
+            with matplotlib.rc_context({"svg.fonttype": "none"}):
+                fig.savefig(buffer, format="svg", metadata=NO_SVG_METADATA)
+            path.write_bytes(optimize_svg(buffer.getvalue()))
+        elif fmt == "svg":
+            fig.savefig(path, metadata=SVG_METADATA)
+        elif fmt == "png":
+            fig.savefig(path, dpi=RASTER_DPI)
+        elif fmt == "webp":
+            from PIL import Image
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=RASTER_DPI)
+            buffer.seek(0)
+            Image.open(buffer).save(path, format="webp", quality=90)
+        else:
+            raise ValueError(f"Unknown output format {fmt}")
+        logger.info("Wrote %s", path)
+        written.append(path)
+    logger.info("Output size %s: %s", target.name, ", ".join(
+        f"{path.suffix[1:]} {path.stat().st_size / 1024:.1f} kB"
+        for path in written))
+    return written
@@ -0,0 +1,100 @@
+"""
+Opt-in instrumentation of the stages in main.process_file (--profile).
+
+Every stage is timed and its peak memory use (as seen by tracemalloc) is
+recorded; when a directory is given, a cProfile dump of the whole file and a
+metrics.jsonl line per file are written there as well.
+"""
+from __future__ import annotations
+import contextlib
+import cProfile
+import json
+import logging
+import pathlib
+import time
+import tracemalloc
+import typing as t
+
+logger = logging.getLogger()
+
+HERE = pathlib.Path(__file__).resolve().parent
+
+
+def dump_name(filename: pathlib.Path) -> str:
+    """
+    The name of the cProfile dump of `filename`: its path relative to the
+    assetfactory directory (without images/), like 2021-08-30-performance.prof,
+    since scripts in different directories can have the same name.
+    """
+    path = filename.resolve()
+    if HERE in path.parents:
+        parts = path.relative_to(HERE).with_suffix(".prof").parts
+        return "-".join(parts[1:] if parts[0] == "images" else parts)
+    return f"{path.stem}.prof"
+
+
+class StageProfiler:
+    def __init__(self, filename: pathlib.Path, enabled: bool = False,
+                 profile_dir: t.Optional[pathlib.Path] = None):
+        self.filename = filename
+        self.enabled = enabled or profile_dir is not None
+        self.profile_dir = profile_dir
+        self.stages: t.MutableMapping[str, t.Mapping[str, float]] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> t.Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+            self.stages[name] = {
+                "seconds": round(seconds, 6),
+                "peak_mib": round(peak_bytes / 2**20, 3),
+            }
+
+    @contextlib.contextmanager
+    def profile(self) -> t.Iterator[None]:
+        """Wraps the processing of the whole file"""
+        if not self.enabled:
+            yield
+            return
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile() if self.profile_dir else None
+        start = time.perf_counter()
+        try:
+            if profiler:
+                profiler.enable()
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            if started_tracing:
+                tracemalloc.stop()
+            self.emit(time.perf_counter() - start, profiler)
+
+    def emit(self, seconds: float,
+             profiler: t.Optional[cProfile.Profile]) -> None:
+        metrics = {
+            "file": str(self.filename),
+            "seconds": round(seconds, 6),
+            "stages": self.stages,
+        }
+        logger.info("Metrics %s", json.dumps(metrics))
+        if self.profile_dir is None:
+            return
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if profiler:
+            target = self.profile_dir / dump_name(self.filename)
+            profiler.dump_stats(target)
+            logger.info("Wrote %s", target)
+        with open(self.profile_dir / "metrics.jsonl", "a") as f:
+            f.write(json.dumps(metrics) + "\n")
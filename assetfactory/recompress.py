@@ -0,0 +1,39 @@
+"""
+Recompresses benchmark results logs, which base.py reads transparently when
+they end in .gz, .xz or .bz2:
+
+    python recompress.py images/2021/08/30/results-*.txt --format xz --remove
+"""
+from __future__ import annotations
+import argparse
+import logging
+import pathlib
+
+from benchmark import load_base
+
+logger = logging.getLogger()
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    base = load_base()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filename", type=pathlib.Path, nargs="+")
+    parser.add_argument("--format", default="xz",
+                        choices=[suffix[1:] for suffix in base.COMPRESSED_OPENERS])
+    parser.add_argument("--remove", action="store_true",
+                        help="Remove the original files")
+    args = parser.parse_args()
+
+    for filename in args.filename:
+        before = filename.stat().st_size
+        target = base.recompressResults(filename, f".{args.format}",
+                                        args.remove)
+        after = target.stat().st_size
+        logger.info("%s -> %s: %.1f kB -> %.1f kB (%.1f%%)", filename,
+                    target.name, before / 1024, after / 1024,
+                    after / before * 100)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,192 @@
+"""
+Reference fzf matcher, to check that the benchmarked implementations find
+the right results:
+
+    python reference.py --haystack-dir .. images/2021/08/30/results-*.txt
+
+matches every query of base.SEARCH_TERMS against the <nrlines>.txt haystacks
+that the runs in the results logs searched, and reports every search whose
+number of results or hash differs. The exit status is 1 if there are any.
+
+Matching is fzf's default extended fuzzy matching (as fzf-lib's
+DefaultOptions): the query is split into terms on spaces, and a line matches
+if it contains the characters of every term in order; smart case, so
+case-insensitive unless the term has capitals. fzf's operators (', ^, $, !,
+|) and the normalisation of accented letters are not implemented, since the
+benchmark queries do not need them. Empty lines are skipped, as the
+benchmark programs do when they load the haystack.
+
+The hash of a search is the hex SHA-1 of the matching lines in haystack
+order, each followed by a newline; the results logs hold the first 5
+characters (see base.ParsedRun).
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import logging
+import pathlib
+import sys
+import typing as t
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+class Haystack:
+    """
+    The lines of a haystack as one byte array, every line followed by a
+    newline; lines are matched all at once against positions in that array.
+    """
+    def __init__(self, data: bytes):
+        chars = np.frombuffer(data, dtype=np.uint8)
+        if len(chars) and chars[-1] != ord("\n"):
+            chars = np.append(chars, np.uint8(ord("\n")))
+        # an empty line is just its newline
+        newlines = np.flatnonzero(chars == ord("\n"))
+        empty = newlines[np.diff(newlines, prepend=-1) == 1]
+        if len(empty):
+            chars = np.delete(chars, empty)
+        self.chars = chars
+        self.ends = np.flatnonzero(chars == ord("\n"))
+        self.starts = np.concatenate([[0], self.ends[:-1] + 1])
+        self._lower: t.Optional[np.ndarray] = None
+        # per (case sensitive, byte) the sorted positions of that byte
+        self._positions: t.Dict[t.Tuple[bool, int], np.ndarray] = {}
+
+    @classmethod
+    def fromFile(cls, filename: pathlib.Path) -> Haystack:
+        return cls(filename.read_bytes())
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def positions(self, byte: int, casesensitive: bool) -> np.ndarray:
+        """
+        The sorted positions of `byte` (lower case if not `casesensitive`),
+        followed by len(self.chars) so that every search finds a position.
+        """
+        key = (casesensitive, byte)
+        if key not in self._positions:
+            chars = self.chars
+            if not casesensitive:
+                if self._lower is None:
+                    upper = (chars >= ord("A")) & (chars <= ord("Z"))
+                    self._lower = chars + upper * np.uint8(32)
+                chars = self._lower
+            self._positions[key] = np.append(np.flatnonzero(chars == byte),
+                                             len(chars))
+        return self._positions[key]
+
+    def _advance(self, matches: np.ndarray, position: np.ndarray, term: str,
+                 casesensitive: bool) -> t.Tuple[np.ndarray, np.ndarray]:
+        """
+        The lines of `matches` that have the characters of `term` in order,
+        from `position` on, and the position after the last of those.
+        """
+        for char in term:
+            byte = ord(char if casesensitive else char.lower())
+            occurrences = self.positions(byte, casesensitive)
+            nextposition = occurrences[np.searchsorted(occurrences, position)]
+            found = nextposition < self.ends[matches]
+            matches = matches[found]
+            position = nextposition[found] + 1
+        return matches, position
+
+    def searches(self, query: str) -> t.Iterator[t.Tuple[str, np.ndarray]]:
+        """
+        For every prefix of `query` (shortest first), the prefix and the
+        (sorted) numbers of the lines that match it. Every character only
+        narrows down the matches of the prefix before it, so all prefixes
+        together cost about as much as the whole query.
+        """
+        matches = np.arange(len(self))
+        # of every line in matches, where the current term continues
+        position = self.starts
+        term = ""
+        for end in range(1, len(query) + 1):
+            char = query[end - 1]
+            if char == " ":
+                # a new term, matched from the start of the line again
+                term = ""
+                position = self.starts[matches]
+            elif term == term.lower() and char != char.lower():
+                # smart case: the term becomes case sensitive, so match it
+                # again; its matches can only get fewer
+                term += char
+                matches, position = self._advance(
+                    matches, self.starts[matches], term, True)
+            else:
+                term += char
+                matches, position = self._advance(
+                    matches, position, char, term != term.lower())
+            yield query[:end], matches
+
+    def resultHash(self, matches: np.ndarray) -> str:
+        """The SHA-1 of the lines `matches`, see the module docstring"""
+        selected = np.zeros(len(self), dtype=bool)
+        selected[matches] = True
+        lengths = self.ends - self.starts + 1
+        return hashlib.sha1(
+            self.chars[np.repeat(selected, lengths)].tobytes()).hexdigest()
+
+
+def expected_results(haystack: Haystack, terms: t.Sequence[str]
+                     ) -> t.Tuple[np.ndarray, np.ndarray]:
+    """
+    The number of results and (5 character) hashes of the searches for
+    `terms`, which are the prefixes of their last term.
+    """
+    nrresults = []
+    hashes = []
+    for term, matches in haystack.searches(terms[-1]):
+        if term in terms:
+            nrresults.append(len(matches))
+            hashes.append(haystack.resultHash(matches)[:5])
+    return np.array(nrresults), np.array(hashes, dtype="U5")
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filename", type=pathlib.Path, nargs="+",
+                        help="Results logs")
+    parser.add_argument("--haystack-dir", type=pathlib.Path,
+                        default=pathlib.Path(".."),
+                        help="Directory with the <nrlines>.txt haystacks")
+    args = parser.parse_args()
+
+    from benchmark import load_base
+    base = load_base()
+    expected: t.Dict[int, t.Tuple[np.ndarray, np.ndarray]] = {}
+    badruns = []
+    for filename in args.filename:
+        table = base.loadRunTableFile(filename)
+        known = ~np.isnan(table.runs["nrlines"])
+        for nrlines in np.unique(table.runs["nrlines"][known]).astype(int):
+            nrlines = int(nrlines)
+            if nrlines in expected:
+                continue
+            haystackfile = args.haystack_dir / f"{nrlines}.txt"
+            if not haystackfile.is_file():
+                logger.warning("No %s, not checking the runs on %d lines",
+                               haystackfile, nrlines)
+                continue
+            haystack = Haystack.fromFile(haystackfile)
+            if len(haystack) != nrlines:
+                logger.warning("%s has %d lines, not checking the runs on %d "
+                               "lines", haystackfile, len(haystack), nrlines)
+                continue
+            expected[nrlines] = expected_results(haystack, base.SEARCH_TERMS)
+            logger.info("%d lines: %s", nrlines, " ".join(
+                map(str, expected[nrlines][0])))
+        for badrun in base.validateRuns(table, expected):
+            logger.warning("%s: %s", filename, badrun)
+            badruns.append(badrun)
+    logger.info("%d bad searches", len(badruns))
+    if badruns:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,119 @@
+"""
+Fits how a measurement scales with the haystack size n to a few cost models
+(a + b·n, a + b·n·log n, a + b·n²), and finds the size where it stops
+scaling linearly.
+
+    python scaling.py --predict 25 26 27
+
+reports the best model, knee and predictions for 2^25, 2^26 and 2^27 lines
+for the init and search times of every implementation in the 2021/08/30
+results.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import typing as t
+
+import numpy as np
+
+logger = logging.getLogger()
+
+MODELS: t.Mapping[str, t.Callable[[np.ndarray], np.ndarray]] = {
+    "a + b·n": lambda n: n,
+    "a + b·n·log n": lambda n: n * np.log2(n),
+    "a + b·n²": lambda n: n ** 2,
+}
+
+# relative deviation from the linear fit of the smaller sizes that counts as
+# leaving linear behaviour
+KNEE_THRESHOLD = 0.25
+
+
+class Fit(t.NamedTuple):
+    model: str
+    a: float
+    b: float
+    # root mean square of the relative residuals
+    error: float
+
+    def predict(self, n: np.ndarray) -> np.ndarray:
+        return self.a + self.b * MODELS[self.model](np.asarray(n, dtype=float))
+
+    def __str__(self) -> str:
+        return f"{self.model} (a = {self.a:.3g}, b = {self.b:.3g})"
+
+
+def fit(n: np.ndarray, y: np.ndarray, model: str) -> Fit:
+    """
+    Least squares fit of the relative residuals, so that the small sizes
+    count as much as the large ones. NaN measurements are ignored.
+    """
+    n = np.asarray(n, dtype=float)
+    y = np.asarray(y, dtype=float)
+    known = ~np.isnan(y) & (y > 0)
+    n, y = n[known], y[known]
+    design = np.column_stack([np.ones_like(n), MODELS[model](n)]) / y[:, np.newaxis]
+    (a, b), *_ = np.linalg.lstsq(design, np.ones_like(y), rcond=None)
+    error = np.sqrt(np.mean((design @ (a, b) - 1) ** 2))
+    return Fit(model, float(a), float(b), float(error))
+
+
+def best_fit(n: np.ndarray, y: np.ndarray) -> Fit:
+    """The model with the smallest error; all have the same two parameters"""
+    return min((fit(n, y, model) for model in MODELS),
+               key=lambda f: f.error)
+
+
+def knee(n: np.ndarray, y: np.ndarray, threshold: float = KNEE_THRESHOLD,
+         minpoints: int = 3) -> t.Optional[int]:
+    """
+    The smallest size from which on all measurements are more than
+    `threshold` slower than a linear fit of all smaller sizes predicts, or
+    None if the measurements stay (close to) linear.
+    """
+    n = np.asarray(n, dtype=float)
+    y = np.asarray(y, dtype=float)
+    known = ~np.isnan(y) & (y > 0)
+    order = np.argsort(n[known])
+    n, y = n[known][order], y[known][order]
+    for index in range(minpoints, len(n)):
+        predicted = fit(n[:index], y[:index], "a + b·n").predict(n[index:])
+        if np.all(y[index:] > predicted * (1 + threshold)):
+            return int(n[index])
+    return None
+
+
+def run():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--predict", type=int, nargs="*", default=[25, 26],
+                        help="Predict for haystacks of 2^<exp> lines")
+    args = parser.parse_args()
+
+    from benchmark import load_base
+    base = load_base()
+    table = base.loadRunTable()
+    keys = sorted(set(table.runs["fzf_type"].tolist()))
+    nrlines = np.unique(table.runs["nrlines"][~np.isnan(table.runs["nrlines"])])
+    values = np.column_stack([table.runs["fzf_init_time_ms"],
+                              np.nansum(table.search_time_ms, axis=1)])
+    stats = base.aggregateRuns(table, values, keys, nrlines,
+                               where=~table.runs["aborted"])
+    predict = 2 ** np.array(args.predict, dtype=float)
+    for keyindex, key in enumerate(keys):
+        for column, measurement in enumerate(("init", "search")):
+            y = stats.mean[keyindex, :, column]
+            if np.count_nonzero(~np.isnan(y) & (y > 0)) < 3:
+                continue
+            best = best_fit(nrlines, y)
+            kneesize = knee(nrlines, y)
+            logger.info(
+                "%-34s %-6s %-40s error %5.1f%%  knee %-9s %s",
+                key, measurement, best, best.error * 100,
+                "-" if kneesize is None else f"2^{kneesize.bit_length() - 1}",
+                "  ".join(f"2^{exp}: {ms / 1000:.1f} s" for exp, ms
+                          in zip(args.predict, best.predict(predict))))
+
+
+if __name__ == "__main__":
+    run()